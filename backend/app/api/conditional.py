@@ -0,0 +1,86 @@
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Annotated
+
+from fastapi import Header, HTTPException, Response
+
+from app.api.responses import model_response
+from app.models import ItemPublic, UserPublic
+
+# Conditional requests (RFC 9110 section 13) on resources with a version
+
+IfNoneMatch = Annotated[str | None, Header()]
+IfModifiedSince = Annotated[str | None, Header()]
+IfMatch = Annotated[str | None, Header()]
+
+VersionedPublic = ItemPublic | UserPublic
+
+
+def get_etag(resource: VersionedPublic) -> str:
+    return f'"{resource.version}"'
+
+
+def get_validator_headers(resource: VersionedPublic) -> dict[str, str]:
+    updated_at = resource.updated_at.astimezone(timezone.utc)
+    return {
+        "ETag": get_etag(resource),
+        "Last-Modified": format_datetime(updated_at, usegmt=True),
+    }
+
+
+def etag_matches(header: str, etag: str, *, weak: bool) -> bool:
+    for tag in header.split(","):
+        tag = tag.strip()
+        if weak:
+            tag = tag.removeprefix("W/")
+        if tag == "*" or tag == etag:
+            return True
+    return False
+
+
+def is_not_modified(
+    resource: VersionedPublic,
+    if_none_match: str | None,
+    if_modified_since: str | None,
+) -> bool:
+    if if_none_match is not None:
+        return etag_matches(if_none_match, get_etag(resource), weak=True)
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        # HTTP dates have a resolution of a second
+        return resource.updated_at.replace(microsecond=0) <= since
+    return False
+
+
+def conditional_response(
+    resource: VersionedPublic,
+    *,
+    if_none_match: str | None,
+    if_modified_since: str | None = None,
+) -> Response:
+    """
+    Send the resource with its validators, or an empty 304 when the client's
+    copy is still current.
+    """
+    headers = get_validator_headers(resource)
+    if is_not_modified(resource, if_none_match, if_modified_since):
+        return Response(status_code=304, headers=headers)
+    return model_response(resource, headers=headers)
+
+
+def check_if_match(resource: VersionedPublic, if_match: str | None) -> None:
+    """
+    Reject the write when the client modified an outdated copy of the resource.
+    """
+    if if_match is not None and not etag_matches(
+        if_match, get_etag(resource), weak=False
+    ):
+        raise HTTPException(
+            status_code=412,
+            detail="The resource was modified since it was fetched",
+        )
@@ -1,5 +1,5 @@
-from collections.abc import Generator
-from typing import Annotated
+from collections.abc import AsyncGenerator, Generator
+from typing import Annotated, TypeVar
 
 import jwt
 from fastapi import Depends, HTTPException, status
@@ -7,11 +7,20 @@ from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core import security
+from app.core.cache import cache_user, get_cached_user
 from app.core.config import settings
-from app.core.db import engine
-from app.models import TokenPayload, User
+from app.core.db import (
+    get_async_read_engine,
+    get_read_engine,
+    record_write,
+    record_write_async,
+)
+from app.models import TokenPayload, User, UserPublic
+
+UserT = TypeVar("UserT", User, UserPublic)
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
@@ -19,26 +28,40 @@ reusable_oauth2 = OAuth2PasswordBearer(
 
 
 def get_db() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+    # Written objects keep their state after commit, instead of being reloaded
+    # with a SELECT when the response is serialized
+    with Session(get_read_engine(), expire_on_commit=False) as session:
+        yield session
+        record_write(session)
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    # Attributes can't be lazy loaded outside of an await, keep them after commit
+    read_engine = await get_async_read_engine()
+    async with AsyncSession(read_engine, expire_on_commit=False) as session:
         yield session
+        await record_write_async(session)
 
 
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
+def decode_token(token: str) -> TokenPayload:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
-        token_data = TokenPayload(**payload)
+        return TokenPayload(**payload)
     except (InvalidTokenError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = session.get(User, token_data.sub)
+
+
+def check_active_user(user: UserT | None) -> UserT:
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
@@ -46,10 +69,42 @@ def get_current_user(session: SessionDep, token: TokenDep) -> User:
     return user
 
 
-CurrentUser = Annotated[User, Depends(get_current_user)]
+def get_current_user(session: SessionDep, token: TokenDep) -> UserPublic:
+    """
+    Resolve the token to the user's authorization fields, from the user cache
+    when possible. Handlers that modify the user should use CurrentDbUser.
+    """
+    token_data = decode_token(token)
+    user = get_cached_user(str(token_data.sub))
+    if user is None:
+        db_user = check_active_user(session.get(User, token_data.sub))
+        return cache_user(db_user)
+    return check_active_user(user)
+
+
+async def get_current_user_async(
+    session: AsyncSessionDep, token: TokenDep
+) -> UserPublic:
+    token_data = decode_token(token)
+    user = get_cached_user(str(token_data.sub))
+    if user is None:
+        db_user = check_active_user(await session.get(User, token_data.sub))
+        return cache_user(db_user)
+    return check_active_user(user)
+
+
+CurrentUser = Annotated[UserPublic, Depends(get_current_user)]
+AsyncCurrentUser = Annotated[UserPublic, Depends(get_current_user_async)]
+
+
+def get_current_db_user(session: SessionDep, current_user: CurrentUser) -> User:
+    return check_active_user(session.get(User, current_user.id))
+
+
+CurrentDbUser = Annotated[User, Depends(get_current_db_user)]
 
 
-def get_current_active_superuser(current_user: CurrentUser) -> User:
+def get_current_active_superuser(current_user: CurrentUser) -> UserPublic:
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=403, detail="The user doesn't have enough privileges"
@@ -1,14 +1,25 @@
 from fastapi import APIRouter
 
-from app.api.routes import items, login, private, users, utils
+from app.api.routes import items_bulk, login, users, utils
 from app.core.config import settings
 
 api_router = APIRouter()
 api_router.include_router(login.router)
 api_router.include_router(users.router)
 api_router.include_router(utils.router)
-api_router.include_router(items.router)
+api_router.include_router(items_bulk.router)
+# Only the route modules that are served are imported, building routes is slow
+if settings.USE_ASYNC_DB:
+    from app.api.routes import items_async
+
+    api_router.include_router(items_async.router)
+else:
+    from app.api.routes import items
+
+    api_router.include_router(items.router)
 
 
 if settings.ENVIRONMENT == "local":
+    from app.api.routes import private
+
     api_router.include_router(private.router)
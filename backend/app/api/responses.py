@@ -0,0 +1,23 @@
+from fastapi import Response
+from pydantic import BaseModel
+
+
+def model_response(
+    model: BaseModel,
+    *,
+    status_code: int = 200,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """
+    Serialize a *Public model straight to JSON bytes with pydantic-core.
+
+    FastAPI validates returned values against the response_model again and
+    turns them into dicts before encoding them, a Response is sent as is. Keep
+    `response_model` on the route for the OpenAPI schema.
+    """
+    return Response(
+        content=model.__pydantic_serializer__.to_json(model),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
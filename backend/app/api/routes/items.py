@@ -1,57 +1,139 @@
 import uuid
 from typing import Any
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, HTTPException, Request, Response
+from sqlmodel import col, select
 
+from app import crud
+from app.api.conditional import (
+    IfMatch,
+    IfModifiedSince,
+    IfNoneMatch,
+    check_if_match,
+    conditional_response,
+    get_validator_headers,
+)
 from app.api.deps import CurrentUser, SessionDep
-from app.models import Item, ItemCreate, ItemPublic, ItemsPublic, ItemUpdate, Message
+from app.api.responses import model_response
+from app.core.filtering import ITEM_FIELDS, FilterQuery, parse_filters, parse_sort
+from app.core.pagination import count_rows, page_with_cursor, paginate
+from app.core.response_cache import ResponseCache, invalidate_owner
+from app.core.search import item_search_filter, search_items
+from app.models import (
+    CountMode,
+    Item,
+    ItemCreate,
+    ItemPublic,
+    ItemsPublic,
+    ItemUpdate,
+    Message,
+)
 
 router = APIRouter(prefix="/items", tags=["items"])
 
 
 @router.get("/", response_model=ItemsPublic)
 def read_items(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+    request: Request,
+    session: SessionDep,
+    current_user: CurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    after: str | None = None,
+    count: CountMode = "exact",
+    q: str | None = None,
+    filters: FilterQuery = None,
+    sort: str | None = None,
 ) -> Any:
     """
     Retrieve items.
+
+    Pass the `next_cursor` of a page as `after` to fetch the following page
+    without scanning the skipped rows.
+
+    Filter with `filter=field:operator:value` on owner_id, title, created_at
+    and updated_at, and sort with `sort=field` or `sort=-field` on created_at
+    and updated_at.
+
+    With `q`, only the items matching the search are returned, best matches
+    first, and pages are fetched with `skip`.
     """
+    cache = ResponseCache(request, current_user)
+    if (body := cache.get()) is not None:
+        return Response(content=body, media_type="application/json")
+
+    conditions = parse_filters(Item, ITEM_FIELDS, filters or [])
+    sort_key = parse_sort(ITEM_FIELDS, sort)
+    if not current_user.is_superuser:
+        conditions.append(col(Item.owner_id) == current_user.id)
 
-    if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Item)
-        count = session.exec(count_statement).one()
-        statement = select(Item).offset(skip).limit(limit)
+    if q:
+        if after or sort:
+            raise HTTPException(
+                status_code=400,
+                detail="Search results are sorted by relevance and paginated with skip",
+            )
+        search = item_search_filter(q)
+        total = count_rows(session, Item, *conditions, search, mode=count)
+        statement = search_items(
+            select(Item).where(*conditions), q, skip=skip, limit=limit
+        )
         items = session.exec(statement).all()
+        page = ItemsPublic(data=items, count=total)
     else:
-        count_statement = (
-            select(func.count())
-            .select_from(Item)
-            .where(Item.owner_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Item)
-            .where(Item.owner_id == current_user.id)
-            .offset(skip)
-            .limit(limit)
+        if filters or current_user.is_superuser:
+            total = count_rows(session, Item, *conditions, mode=count)
+        else:
+            # The per-owner counter is exact and a primary key lookup away
+            total = None
+            if count != "none":
+                total = crud.get_item_count(session=session, owner_id=current_user.id)
+        statement = paginate(
+            select(Item).where(*conditions),
+            Item,
+            skip=skip,
+            limit=limit,
+            after=after,
+            sort=sort_key,
         )
         items = session.exec(statement).all()
-
-    return ItemsPublic(data=items, count=count)
+        data, next_cursor = page_with_cursor(list(items), limit, sort_key)
+        page = ItemsPublic(data=data, count=total, next_cursor=next_cursor)
+    response = model_response(page)
+    cache.set(response.body)
+    return response
 
 
 @router.get("/{id}", response_model=ItemPublic)
-def read_item(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
+def read_item(
+    request: Request,
+    session: SessionDep,
+    current_user: CurrentUser,
+    id: uuid.UUID,
+    if_none_match: IfNoneMatch = None,
+    if_modified_since: IfModifiedSince = None,
+) -> Any:
     """
     Get item by ID.
+
+    Answers 304 Not Modified when `If-None-Match` has the current `ETag`.
     """
-    item = session.get(Item, id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
-    if not current_user.is_superuser and (item.owner_id != current_user.id):
-        raise HTTPException(status_code=400, detail="Not enough permissions")
-    return item
+    cache = ResponseCache(request, current_user)
+    if (body := cache.get()) is not None:
+        item_public = ItemPublic.model_validate_json(body)
+    else:
+        item = session.get(Item, id)
+        if not item:
+            raise HTTPException(status_code=404, detail="Item not found")
+        if not current_user.is_superuser and (item.owner_id != current_user.id):
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+        item_public = ItemPublic.model_validate(item)
+        cache.set(item_public.__pydantic_serializer__.to_json(item_public))
+    return conditional_response(
+        item_public,
+        if_none_match=if_none_match,
+        if_modified_since=if_modified_since,
+    )
 
 
 @router.post("/", response_model=ItemPublic)
@@ -61,10 +143,7 @@ def create_item(
     """
     Create new item.
     """
-    item = Item.model_validate(item_in, update={"owner_id": current_user.id})
-    session.add(item)
-    session.commit()
-    session.refresh(item)
+    item = crud.create_item(session=session, item_in=item_in, owner_id=current_user.id)
     return item
 
 
@@ -75,21 +154,30 @@ def update_item(
     current_user: CurrentUser,
     id: uuid.UUID,
     item_in: ItemUpdate,
+    response: Response,
+    if_match: IfMatch = None,
 ) -> Any:
     """
     Update an item.
+
+    Send the `ETag` of the item as `If-Match` to fail with 412 Precondition
+    Failed instead of overwriting a concurrent change.
     """
-    item = session.get(Item, id)
+    # Lock the row so it can't change between the check and the update
+    item = session.get(Item, id, with_for_update=if_match is not None)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     if not current_user.is_superuser and (item.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
+    check_if_match(ItemPublic.model_validate(item), if_match)
     update_dict = item_in.model_dump(exclude_unset=True)
     item.sqlmodel_update(update_dict)
     session.add(item)
     session.commit()
-    session.refresh(item)
-    return item
+    invalidate_owner(item.owner_id)
+    item_public = ItemPublic.model_validate(item)
+    response.headers.update(get_validator_headers(item_public))
+    return item_public
 
 
 @router.delete("/{id}")
@@ -105,5 +193,7 @@ def delete_item(
     if not current_user.is_superuser and (item.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
     session.delete(item)
+    crud.adjust_item_count(session=session, owner_id=item.owner_id, delta=-1)
     session.commit()
+    invalidate_owner(item.owner_id)
     return Message(message="Item deleted successfully")
@@ -0,0 +1,211 @@
+import uuid
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from sqlmodel import col, select
+
+from app import crud_async
+from app.api.conditional import (
+    IfMatch,
+    IfModifiedSince,
+    IfNoneMatch,
+    check_if_match,
+    conditional_response,
+    get_validator_headers,
+)
+from app.api.deps import AsyncCurrentUser, AsyncSessionDep
+from app.api.responses import model_response
+from app.core.filtering import ITEM_FIELDS, FilterQuery, parse_filters, parse_sort
+from app.core.pagination import count_rows, page_with_cursor, paginate
+from app.core.response_cache import ResponseCache, invalidate_owner
+from app.core.search import item_search_filter, search_items
+from app.models import (
+    CountMode,
+    Item,
+    ItemCreate,
+    ItemPublic,
+    ItemsPublic,
+    ItemUpdate,
+    Message,
+)
+
+# Async twin of app.api.routes.items, enabled with settings.USE_ASYNC_DB. Route
+# names match so the generated OpenAPI operations are the same in both modes.
+router = APIRouter(prefix="/items", tags=["items"])
+
+
+@router.get("/", response_model=ItemsPublic)
+async def read_items(
+    request: Request,
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    after: str | None = None,
+    count: CountMode = "exact",
+    q: str | None = None,
+    filters: FilterQuery = None,
+    sort: str | None = None,
+) -> Any:
+    """
+    Retrieve items.
+
+    Pass the `next_cursor` of a page as `after` to fetch the following page
+    without scanning the skipped rows.
+
+    Filter with `filter=field:operator:value` on owner_id, title, created_at
+    and updated_at, and sort with `sort=field` or `sort=-field` on created_at
+    and updated_at.
+
+    With `q`, only the items matching the search are returned, best matches
+    first, and pages are fetched with `skip`.
+    """
+    cache = ResponseCache(request, current_user)
+    if (body := cache.get()) is not None:
+        return Response(content=body, media_type="application/json")
+
+    conditions = parse_filters(Item, ITEM_FIELDS, filters or [])
+    sort_key = parse_sort(ITEM_FIELDS, sort)
+    if not current_user.is_superuser:
+        conditions.append(col(Item.owner_id) == current_user.id)
+
+    if q:
+        if after or sort:
+            raise HTTPException(
+                status_code=400,
+                detail="Search results are sorted by relevance and paginated with skip",
+            )
+        search = item_search_filter(q)
+        total = await session.run_sync(
+            lambda s: count_rows(s, Item, *conditions, search, mode=count)
+        )
+        statement = search_items(
+            select(Item).where(*conditions), q, skip=skip, limit=limit
+        )
+        items = (await session.exec(statement)).all()
+        page = ItemsPublic(data=items, count=total)
+    else:
+        if filters or current_user.is_superuser:
+            total = await session.run_sync(
+                lambda s: count_rows(s, Item, *conditions, mode=count)
+            )
+        else:
+            # The per-owner counter is exact and a primary key lookup away
+            total = None
+            if count != "none":
+                total = await crud_async.get_item_count(
+                    session=session, owner_id=current_user.id
+                )
+        statement = paginate(
+            select(Item).where(*conditions),
+            Item,
+            skip=skip,
+            limit=limit,
+            after=after,
+            sort=sort_key,
+        )
+        items = (await session.exec(statement)).all()
+        data, next_cursor = page_with_cursor(list(items), limit, sort_key)
+        page = ItemsPublic(data=data, count=total, next_cursor=next_cursor)
+    response = model_response(page)
+    cache.set(response.body)
+    return response
+
+
+@router.get("/{id}", response_model=ItemPublic)
+async def read_item(
+    request: Request,
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
+    id: uuid.UUID,
+    if_none_match: IfNoneMatch = None,
+    if_modified_since: IfModifiedSince = None,
+) -> Any:
+    """
+    Get item by ID.
+
+    Answers 304 Not Modified when `If-None-Match` has the current `ETag`.
+    """
+    cache = ResponseCache(request, current_user)
+    if (body := cache.get()) is not None:
+        item_public = ItemPublic.model_validate_json(body)
+    else:
+        item = await session.get(Item, id)
+        if not item:
+            raise HTTPException(status_code=404, detail="Item not found")
+        if not current_user.is_superuser and (item.owner_id != current_user.id):
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+        item_public = ItemPublic.model_validate(item)
+        cache.set(item_public.__pydantic_serializer__.to_json(item_public))
+    return conditional_response(
+        item_public,
+        if_none_match=if_none_match,
+        if_modified_since=if_modified_since,
+    )
+
+
+@router.post("/", response_model=ItemPublic)
+async def create_item(
+    *, session: AsyncSessionDep, current_user: AsyncCurrentUser, item_in: ItemCreate
+) -> Any:
+    """
+    Create new item.
+    """
+    item = await crud_async.create_item(
+        session=session, item_in=item_in, owner_id=current_user.id
+    )
+    return item
+
+
+@router.put("/{id}", response_model=ItemPublic)
+async def update_item(
+    *,
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
+    id: uuid.UUID,
+    item_in: ItemUpdate,
+    response: Response,
+    if_match: IfMatch = None,
+) -> Any:
+    """
+    Update an item.
+
+    Send the `ETag` of the item as `If-Match` to fail with 412 Precondition
+    Failed instead of overwriting a concurrent change.
+    """
+    # Lock the row so it can't change between the check and the update
+    item = await session.get(Item, id, with_for_update=if_match is not None)
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    if not current_user.is_superuser and (item.owner_id != current_user.id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    check_if_match(ItemPublic.model_validate(item), if_match)
+    update_dict = item_in.model_dump(exclude_unset=True)
+    item.sqlmodel_update(update_dict)
+    session.add(item)
+    await session.commit()
+    invalidate_owner(item.owner_id)
+    item_public = ItemPublic.model_validate(item)
+    response.headers.update(get_validator_headers(item_public))
+    return item_public
+
+
+@router.delete("/{id}")
+async def delete_item(
+    session: AsyncSessionDep, current_user: AsyncCurrentUser, id: uuid.UUID
+) -> Message:
+    """
+    Delete an item.
+    """
+    item = await session.get(Item, id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    if not current_user.is_superuser and (item.owner_id != current_user.id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    await session.delete(item)
+    await crud_async.adjust_item_count(
+        session=session, owner_id=item.owner_id, delta=-1
+    )
+    await session.commit()
+    invalidate_owner(item.owner_id)
+    return Message(message="Item deleted successfully")
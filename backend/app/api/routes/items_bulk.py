@@ -0,0 +1,77 @@
+from typing import Any
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from sqlmodel import col, select
+
+from app import crud
+from app.api.deps import CurrentUser, SessionDep
+from app.api.export import ExportFormat, export_response
+from app.models import (
+    Item,
+    ItemPublic,
+    ItemsBulkCreate,
+    ItemsBulkDelete,
+    ItemsBulkResult,
+    ItemsBulkUpdate,
+)
+
+# Routes over many items at once. Mounted before the item routes so "/items/bulk"
+# and "/items/export" aren't matched as an item id
+router = APIRouter(prefix="/items", tags=["items"])
+
+
+@router.get("/export", response_class=StreamingResponse)
+def export_items(current_user: CurrentUser, format: ExportFormat = "ndjson") -> Any:
+    """
+    Export all items as NDJSON or CSV.
+    """
+    statement = select(Item).order_by(col(Item.created_at), col(Item.id))
+    if not current_user.is_superuser:
+        statement = statement.where(Item.owner_id == current_user.id)
+    return export_response(statement, ItemPublic, filename="items", format=format)
+
+
+@router.post("/bulk", response_model=ItemsBulkResult)
+def create_items(
+    *, session: SessionDep, current_user: CurrentUser, items_in: ItemsBulkCreate
+) -> Any:
+    """
+    Create several items in one transaction.
+    """
+    results = crud.create_items(
+        session=session, items_in=items_in.data, owner_id=current_user.id
+    )
+    return ItemsBulkResult(data=results)
+
+
+@router.patch("/bulk", response_model=ItemsBulkResult)
+def update_items(
+    *, session: SessionDep, current_user: CurrentUser, items_in: ItemsBulkUpdate
+) -> Any:
+    """
+    Update several items in one transaction.
+
+    Items that don't exist or aren't owned by the user are reported with an
+    error, the others are still updated.
+    """
+    results = crud.update_items(
+        session=session, items_in=items_in.data, current_user=current_user
+    )
+    return ItemsBulkResult(data=results)
+
+
+@router.delete("/bulk", response_model=ItemsBulkResult)
+def delete_items(
+    *, session: SessionDep, current_user: CurrentUser, items_in: ItemsBulkDelete
+) -> Any:
+    """
+    Delete several items in one transaction.
+
+    Items that don't exist or aren't owned by the user are reported with an
+    error, the others are still deleted.
+    """
+    results = crud.delete_items(
+        session=session, ids=items_in.ids, current_user=current_user
+    )
+    return ItemsBulkResult(data=results)
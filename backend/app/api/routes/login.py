@@ -1,18 +1,19 @@
 from datetime import timedelta
 from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import HTMLResponse
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app import crud
 from app.api.deps import CurrentUser, SessionDep, get_current_active_superuser
 from app.core import security
+from app.core.cache import invalidate_user
 from app.core.config import settings
+from app.core.rate_limit import check_rate_limit
 from app.core.security import get_password_hash
 from app.models import Message, NewPassword, Token, UserPublic
 from app.utils import (
-    generate_password_reset_token,
     generate_reset_password_email,
     send_email,
     verify_password_reset_token,
@@ -23,11 +24,14 @@ router = APIRouter(tags=["login"])
 
 @router.post("/login/access-token")
 def login_access_token(
-    session: SessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
+    request: Request,
+    session: SessionDep,
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> Token:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
+    check_rate_limit(request, "login", form_data.username)
     user = crud.authenticate(
         session=session, email=form_data.username, password=form_data.password
     )
@@ -52,10 +56,11 @@ def test_token(current_user: CurrentUser) -> Any:
 
 
 @router.post("/password-recovery/{email}")
-def recover_password(email: str, session: SessionDep) -> Message:
+def recover_password(request: Request, email: str, session: SessionDep) -> Message:
     """
     Password Recovery
     """
+    check_rate_limit(request, "password-recovery", email)
     user = crud.get_user_by_email(session=session, email=email)
 
     if not user:
@@ -63,24 +68,18 @@ def recover_password(email: str, session: SessionDep) -> Message:
             status_code=404,
             detail="The user with this email does not exist in the system.",
         )
-    password_reset_token = generate_password_reset_token(email=email)
-    email_data = generate_reset_password_email(
-        email_to=user.email, email=email, token=password_reset_token
-    )
-    send_email(
-        email_to=user.email,
-        subject=email_data.subject,
-        html_content=email_data.html_content,
-    )
+    email_data = generate_reset_password_email(email_to=user.email, email=email)
+    send_email(email_to=user.email, email_data=email_data)
     return Message(message="Password recovery email sent")
 
 
 @router.post("/reset-password/")
-def reset_password(session: SessionDep, body: NewPassword) -> Message:
+def reset_password(request: Request, session: SessionDep, body: NewPassword) -> Message:
     """
     Reset password
     """
     email = verify_password_reset_token(token=body.token)
+    check_rate_limit(request, "reset-password", email)
     if not email:
         raise HTTPException(status_code=400, detail="Invalid token")
     user = crud.get_user_by_email(session=session, email=email)
@@ -95,6 +94,7 @@ def reset_password(session: SessionDep, body: NewPassword) -> Message:
     user.hashed_password = hashed_password
     session.add(user)
     session.commit()
+    invalidate_user(user.id)
     return Message(message="Password updated successfully")
 
 
@@ -114,10 +114,7 @@ def recover_password_html_content(email: str, session: SessionDep) -> Any:
             status_code=404,
             detail="The user with this username does not exist in the system.",
         )
-    password_reset_token = generate_password_reset_token(email=email)
-    email_data = generate_reset_password_email(
-        email_to=user.email, email=email, token=password_reset_token
-    )
+    email_data = generate_reset_password_email(email_to=user.email, email=email)
 
     return HTMLResponse(
         content=email_data.html_content, headers={"subject:": email_data.subject}
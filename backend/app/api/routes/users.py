@@ -1,19 +1,36 @@
 import uuid
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import col, delete, func, select
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel import col, select
 
 from app import crud
+from app.api.conditional import (
+    IfMatch,
+    IfModifiedSince,
+    IfNoneMatch,
+    check_if_match,
+    conditional_response,
+    get_validator_headers,
+)
 from app.api.deps import (
+    CurrentDbUser,
     CurrentUser,
     SessionDep,
     get_current_active_superuser,
 )
+from app.api.export import ExportFormat, export_response
+from app.api.responses import model_response
+from app.core import user_purge
+from app.core.cache import invalidate_user
 from app.core.config import settings
+from app.core.filtering import USER_FIELDS, FilterQuery, parse_filters, parse_sort
+from app.core.pagination import count_rows, page_with_cursor, paginate
+from app.core.rate_limit import check_rate_limit
 from app.core.security import get_password_hash, verify_password
 from app.models import (
-    Item,
+    CountMode,
     Message,
     UpdatePassword,
     User,
@@ -34,18 +51,39 @@ router = APIRouter(prefix="/users", tags=["users"])
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UsersPublic,
 )
-def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+def read_users(
+    session: SessionDep,
+    skip: int = 0,
+    limit: int = 100,
+    after: str | None = None,
+    count: CountMode = "exact",
+    filters: FilterQuery = None,
+    sort: str | None = None,
+) -> Any:
     """
     Retrieve users.
+
+    Filter with `filter=field:operator:value` on email, is_active,
+    is_superuser, created_at and updated_at, and sort with `sort=field` or
+    `sort=-field` on email, created_at and updated_at.
     """
+    conditions = parse_filters(User, USER_FIELDS, filters or [])
+    sort_key = parse_sort(USER_FIELDS, sort)
 
-    count_statement = select(func.count()).select_from(User)
-    count = session.exec(count_statement).one()
+    total = count_rows(session, User, *conditions, mode=count)
 
-    statement = select(User).offset(skip).limit(limit)
+    statement = paginate(
+        select(User).where(*conditions),
+        User,
+        skip=skip,
+        limit=limit,
+        after=after,
+        sort=sort_key,
+    )
     users = session.exec(statement).all()
 
-    return UsersPublic(data=users, count=count)
+    data, next_cursor = page_with_cursor(list(users), limit, sort_key)
+    return model_response(UsersPublic(data=data, count=total, next_cursor=next_cursor))
 
 
 @router.post(
@@ -65,23 +103,30 @@ def create_user(*, session: SessionDep, user_in: UserCreate) -> Any:
     user = crud.create_user(session=session, user_create=user_in)
     if settings.emails_enabled and user_in.email:
         email_data = generate_new_account_email(
-            email_to=user_in.email, username=user_in.email, password=user_in.password
-        )
-        send_email(
-            email_to=user_in.email,
-            subject=email_data.subject,
-            html_content=email_data.html_content,
+            email_to=user_in.email, username=user_in.email
         )
+        send_email(email_to=user_in.email, email_data=email_data)
     return user
 
 
 @router.patch("/me", response_model=UserPublic)
 def update_user_me(
-    *, session: SessionDep, user_in: UserUpdateMe, current_user: CurrentUser
+    *,
+    session: SessionDep,
+    user_in: UserUpdateMe,
+    current_user: CurrentDbUser,
+    response: Response,
+    if_match: IfMatch = None,
 ) -> Any:
     """
     Update own user.
+
+    Send the `ETag` of the user as `If-Match` to fail with 412 Precondition
+    Failed instead of overwriting a concurrent change.
     """
+    if if_match is not None:
+        session.refresh(current_user, with_for_update=True)
+        check_if_match(UserPublic.model_validate(current_user), if_match)
 
     if user_in.email:
         existing_user = crud.get_user_by_email(session=session, email=user_in.email)
@@ -93,13 +138,15 @@ def update_user_me(
     current_user.sqlmodel_update(user_data)
     session.add(current_user)
     session.commit()
-    session.refresh(current_user)
-    return current_user
+    invalidate_user(current_user.id)
+    user_public = UserPublic.model_validate(current_user)
+    response.headers.update(get_validator_headers(user_public))
+    return user_public
 
 
 @router.patch("/me/password", response_model=Message)
 def update_password_me(
-    *, session: SessionDep, body: UpdatePassword, current_user: CurrentUser
+    *, session: SessionDep, body: UpdatePassword, current_user: CurrentDbUser
 ) -> Any:
     """
     Update own password.
@@ -114,36 +161,54 @@ def update_password_me(
     current_user.hashed_password = hashed_password
     session.add(current_user)
     session.commit()
+    invalidate_user(current_user.id)
     return Message(message="Password updated successfully")
 
 
 @router.get("/me", response_model=UserPublic)
-def read_user_me(current_user: CurrentUser) -> Any:
+def read_user_me(
+    current_user: CurrentUser,
+    if_none_match: IfNoneMatch = None,
+    if_modified_since: IfModifiedSince = None,
+) -> Any:
     """
     Get current user.
+
+    Answers 304 Not Modified when `If-None-Match` has the current `ETag`.
     """
-    return current_user
+    return conditional_response(
+        current_user,
+        if_none_match=if_none_match,
+        if_modified_since=if_modified_since,
+    )
 
 
-@router.delete("/me", response_model=Message)
-def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
+@router.delete("/me", response_model=Message, responses={202: {"model": Message}})
+def delete_user_me(
+    session: SessionDep, current_user: CurrentDbUser, response: Response
+) -> Any:
     """
     Delete own user.
+
+    Users with many items are deactivated at once and deleted in the
+    background, the response is then 202 Accepted.
     """
     if current_user.is_superuser:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
-    session.delete(current_user)
-    session.commit()
+    if user_purge.delete_user(session=session, db_user=current_user):
+        response.status_code = 202
+        return Message(message="User deletion scheduled")
     return Message(message="User deleted successfully")
 
 
 @router.post("/signup", response_model=UserPublic)
-def register_user(session: SessionDep, user_in: UserRegister) -> Any:
+def register_user(request: Request, session: SessionDep, user_in: UserRegister) -> Any:
     """
     Create new user without the need to be logged in.
     """
+    check_rate_limit(request, "signup", user_in.email)
     user = crud.get_user_by_email(session=session, email=user_in.email)
     if user:
         raise HTTPException(
@@ -155,22 +220,45 @@ def register_user(session: SessionDep, user_in: UserRegister) -> Any:
     return user
 
 
+@router.get(
+    "/export",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_class=StreamingResponse,
+)
+def export_users(format: ExportFormat = "ndjson") -> Any:
+    """
+    Export all users as NDJSON or CSV.
+    """
+    statement = select(User).order_by(col(User.created_at), col(User.id))
+    return export_response(statement, UserPublic, filename="users", format=format)
+
+
 @router.get("/{user_id}", response_model=UserPublic)
 def read_user_by_id(
-    user_id: uuid.UUID, session: SessionDep, current_user: CurrentUser
+    user_id: uuid.UUID,
+    session: SessionDep,
+    current_user: CurrentUser,
+    if_none_match: IfNoneMatch = None,
+    if_modified_since: IfModifiedSince = None,
 ) -> Any:
     """
     Get a specific user by id.
+
+    Answers 304 Not Modified when `If-None-Match` has the current `ETag`.
     """
     user = session.get(User, user_id)
-    if user == current_user:
-        return user
-    if not current_user.is_superuser:
+    if not (user and user.id == current_user.id) and not current_user.is_superuser:
         raise HTTPException(
             status_code=403,
             detail="The user doesn't have enough privileges",
         )
-    return user
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return conditional_response(
+        UserPublic.model_validate(user),
+        if_none_match=if_none_match,
+        if_modified_since=if_modified_since,
+    )
 
 
 @router.patch(
@@ -183,17 +271,24 @@ def update_user(
     session: SessionDep,
     user_id: uuid.UUID,
     user_in: UserUpdate,
+    response: Response,
+    if_match: IfMatch = None,
 ) -> Any:
     """
     Update a user.
+
+    Send the `ETag` of the user as `If-Match` to fail with 412 Precondition
+    Failed instead of overwriting a concurrent change.
     """
 
-    db_user = session.get(User, user_id)
+    # Lock the row so it can't change between the check and the update
+    db_user = session.get(User, user_id, with_for_update=if_match is not None)
     if not db_user:
         raise HTTPException(
             status_code=404,
             detail="The user with this id does not exist in the system",
         )
+    check_if_match(UserPublic.model_validate(db_user), if_match)
     if user_in.email:
         existing_user = crud.get_user_by_email(session=session, email=user_in.email)
         if existing_user and existing_user.id != user_id:
@@ -202,25 +297,36 @@ def update_user(
             )
 
     db_user = crud.update_user(session=session, db_user=db_user, user_in=user_in)
-    return db_user
+    user_public = UserPublic.model_validate(db_user)
+    response.headers.update(get_validator_headers(user_public))
+    return user_public
 
 
-@router.delete("/{user_id}", dependencies=[Depends(get_current_active_superuser)])
+@router.delete(
+    "/{user_id}",
+    dependencies=[Depends(get_current_active_superuser)],
+    responses={202: {"model": Message}},
+)
 def delete_user(
-    session: SessionDep, current_user: CurrentUser, user_id: uuid.UUID
+    session: SessionDep,
+    current_user: CurrentUser,
+    user_id: uuid.UUID,
+    response: Response,
 ) -> Message:
     """
     Delete a user.
+
+    Users with many items are deactivated at once and deleted in the
+    background, the response is then 202 Accepted.
     """
     user = session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    if user == current_user:
+    if user.id == current_user.id:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
-    statement = delete(Item).where(col(Item.owner_id) == user_id)
-    session.exec(statement)  # type: ignore
-    session.delete(user)
-    session.commit()
+    if user_purge.delete_user(session=session, db_user=user):
+        response.status_code = 202
+        return Message(message="User deletion scheduled")
     return Message(message="User deleted successfully")
@@ -1,8 +1,17 @@
+import os
+
 from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
 
 from app.api.deps import get_current_active_superuser
-from app.models import Message
+from app.core.db import (
+    async_engine,
+    async_replica_engines,
+    engine,
+    get_pool_status,
+    replica_engines,
+)
+from app.models import Message, PoolsStatus
 from app.utils import generate_test_email, send_email
 
 router = APIRouter(prefix="/utils", tags=["utils"])
@@ -18,14 +27,35 @@ def test_email(email_to: EmailStr) -> Message:
     Test emails.
     """
     email_data = generate_test_email(email_to=email_to)
-    send_email(
-        email_to=email_to,
-        subject=email_data.subject,
-        html_content=email_data.html_content,
-    )
+    send_email(email_to=email_to, email_data=email_data)
     return Message(message="Test email sent")
 
 
+@router.get(
+    "/db-pool/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def db_pool_status() -> PoolsStatus:
+    """
+    Connection pool usage of the worker process serving this request.
+    """
+    return PoolsStatus(
+        pid=os.getpid(),
+        pools=[
+            get_pool_status("sync", engine.pool),
+            get_pool_status("async", async_engine.pool),
+            *(
+                get_pool_status(f"sync-replica-{index}", replica.pool)
+                for index, replica in enumerate(replica_engines)
+            ),
+            *(
+                get_pool_status(f"async-replica-{index}", replica.pool)
+                for index, replica in enumerate(async_replica_engines)
+            ),
+        ],
+    )
+
+
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
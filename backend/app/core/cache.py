@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Protocol, cast
+
+from app.core.config import settings
+from app.models import User, UserPublic
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Any | None: ...
+
+    def set(self, key: str, value: Any, ttl: float) -> None: ...
+
+    def add(self, key: str, value: Any, ttl: float) -> bool:
+        """
+        Set the key unless it's already set, returns whether it was.
+        """
+        ...
+
+    def delete(self, key: str) -> None: ...
+
+
+class MemoryCache:
+    """
+    Per-process LRU cache whose entries expire after their TTL.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        # Sync routes run in a thread pool
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def _store(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def add(self, key: str, value: Any, ttl: float) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                return False
+            self._store(key, value, ttl)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCache:
+    """
+    Cache shared by every worker, values are stored as JSON.
+    """
+
+    def __init__(self, url: str, namespace: str) -> None:
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.namespace = namespace
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Any | None:
+        raw = cast(bytes | None, self.client.get(self._key(key)))
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.client.set(self._key(key), json.dumps(value), px=int(ttl * 1000))
+
+    def add(self, key: str, value: Any, ttl: float) -> bool:
+        return bool(
+            self.client.set(
+                self._key(key), json.dumps(value), px=int(ttl * 1000), nx=True
+            )
+        )
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self._key(key))
+
+
+def get_cache(namespace: str, max_size: int) -> CacheBackend:
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCache(settings.REDIS_URL, namespace)
+    return MemoryCache(max_size)
+
+
+# Authorization fields of authenticated users, so that resolving the current
+# user from a token doesn't need a database round trip
+user_cache = get_cache("user", settings.USER_CACHE_MAX_SIZE)
+
+
+def get_cached_user(user_id: str) -> UserPublic | None:
+    if not settings.USER_CACHE_TTL_SECONDS:
+        return None
+    data = user_cache.get(user_id)
+    return None if data is None else UserPublic.model_validate(data)
+
+
+def cache_user(user: User) -> UserPublic:
+    user_public = UserPublic.model_validate(user)
+    if settings.USER_CACHE_TTL_SECONDS:
+        user_cache.set(
+            str(user.id),
+            user_public.model_dump(mode="json"),
+            settings.USER_CACHE_TTL_SECONDS,
+        )
+    return user_public
+
+
+def invalidate_user(user_id: uuid.UUID) -> None:
+    user_cache.delete(str(user_id))
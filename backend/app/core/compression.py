@@ -0,0 +1,197 @@
+import importlib.util
+import logging
+import zlib
+from collections.abc import Callable
+from typing import Literal, Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+Compression = Literal["off", "gzip", "br"]
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def finish(self) -> bytes: ...
+
+
+class GZipCompressor:
+    def __init__(self, level: int) -> None:
+        # wbits=31 writes the gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, quality: int) -> None:
+        import brotli  # type: ignore
+
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)  # type: ignore
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()  # type: ignore
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """
+    Quality values of the codings of an Accept-Encoding header (RFC 9110), 1
+    when not given. Invalid values count as 0, so the coding isn't used.
+    """
+    qualities: dict[str, float] = {}
+    for item in header.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+                if not 0.0 <= quality <= 1.0:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    return qualities
+
+
+class CompressionResponder:
+    """
+    Compress the body of a single response, buffered or streamed.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        encoding: str,
+        compressor_factory: Callable[[], Compressor],
+        minimum_size: int,
+    ) -> None:
+        self.app = app
+        self.encoding = encoding
+        self.compressor_factory = compressor_factory
+        self.minimum_size = minimum_size
+        self.send: Send | None = None
+        self.initial_message: Message = {}
+        self.compressor: Compressor | None = None
+        self.started = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        assert self.send
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk decides the headers
+            self.initial_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            if "content-encoding" not in headers and (
+                more_body or len(body) >= self.minimum_size
+            ):
+                self.compressor = self.compressor_factory()
+                headers["Content-Encoding"] = self.encoding
+                headers.add_vary_header("Accept-Encoding")
+                body = self._compress(body, more_body)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(body))
+                message["body"] = body
+            await self.send(self.initial_message)
+        elif self.compressor is not None:
+            message["body"] = self._compress(body, more_body)
+        await self.send(message)
+
+    def _compress(self, body: bytes, more_body: bool) -> bytes:
+        assert self.compressor
+        body = self.compressor.compress(body)
+        if not more_body:
+            body += self.compressor.finish()
+        return body
+
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least `minimum_size` bytes with Brotli, when
+    configured and accepted by the client, or else with gzip. Without the
+    brotli package, "br" falls back to gzip for every client.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        compression: Compression,
+        minimum_size: int,
+        gzip_level: int,
+        brotli_quality: int,
+    ) -> None:
+        self.app = app
+        # Checked at startup, not when the first response is compressed. The
+        # package itself is imported on first use
+        if compression == "br" and importlib.util.find_spec("brotli") is None:
+            logger.warning(
+                'COMPRESSION is "br" but brotli is not installed, using gzip'
+            )
+            compression = "gzip"
+        self.compression = compression
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _negotiate(self, scope: Scope) -> tuple[str, Callable[[], Compressor]] | None:
+        qualities = parse_accept_encoding(
+            Headers(scope=scope).get("Accept-Encoding", "")
+        )
+        codings: list[tuple[str, Callable[[], Compressor]]] = []
+        if self.compression == "br":
+            codings.append(("br", lambda: BrotliCompressor(self.brotli_quality)))
+        if self.compression != "off":
+            codings.append(("gzip", lambda: GZipCompressor(self.gzip_level)))
+        # The highest quality wins, Brotli on a tie
+        best: tuple[str, Callable[[], Compressor]] | None = None
+        best_quality = 0.0
+        for coding in codings:
+            quality = qualities.get(coding[0], qualities.get("*", 0.0))
+            if quality > best_quality:
+                best, best_quality = coding, quality
+        # Unless the client prefers the uncompressed body
+        if qualities.get("identity", 0.0) > best_quality:
+            return None
+        return best
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        negotiated = self._negotiate(scope) if scope["type"] == "http" else None
+        if negotiated is None:
+            await self.app(scope, receive, send)
+            return
+        encoding, compressor_factory = negotiated
+        responder = CompressionResponder(
+            self.app,
+            encoding=encoding,
+            compressor_factory=compressor_factory,
+            minimum_size=self.minimum_size,
+        )
+        await responder(scope, receive, send)
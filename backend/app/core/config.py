@@ -15,6 +15,9 @@ from pydantic_core import MultiHostUrl
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing_extensions import Self
 
+# Threads that run the sync routes and dependencies of a worker, anyio's default
+THREADPOOL_SIZE = 40
+
 
 def parse_cors(v: Any) -> list[str] | str:
     if isinstance(v, str) and not v.startswith("["):
@@ -69,6 +72,140 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # Primary keys of new rows. "uuid7" ids start with their creation time, so
+    # inserts go to the end of the primary key indexes instead of all over them
+    ID_GENERATOR: Literal["uuid4", "uuid7"] = "uuid7"
+
+    # Connection pool, per worker process. Keep
+    # workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below Postgres' max_connections
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    # Behind PgBouncer in transaction mode: no client side pool and no server
+    # side prepared statements
+    DB_PGBOUNCER: bool = False
+    # Statements slower than this are logged, 0 disables the log
+    DB_SLOW_QUERY_MS: float = 200.0
+    # Count the statements of each request, report them in a Server-Timing
+    # header and warn when a request runs the same statement more than
+    # DB_REPEATED_QUERY_THRESHOLD times, usually lazy loads in a loop (N+1)
+    DB_QUERY_STATS: bool = True
+    DB_REPEATED_QUERY_THRESHOLD: int = 10
+
+    # Streaming replicas of POSTGRES_DB, as "host" or "host:port", reached with
+    # the same credentials. GET requests read from a random replica, except
+    # that a client that wrote in the last DB_READ_YOUR_WRITES_SECONDS reads
+    # from a replica that has replayed its writes, or else from the primary
+    POSTGRES_REPLICAS: Annotated[list[str] | str, BeforeValidator(parse_cors)] = []
+    DB_READ_YOUR_WRITES_SECONDS: int = 10
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def replica_database_uris(self) -> list[PostgresDsn]:
+        uris = []
+        for replica in self.POSTGRES_REPLICAS:
+            host, _, port = replica.partition(":")
+            uris.append(
+                MultiHostUrl.build(
+                    scheme="postgresql+psycopg",
+                    username=self.POSTGRES_USER,
+                    password=self.POSTGRES_PASSWORD,
+                    host=host,
+                    port=int(port) if port else self.POSTGRES_PORT,
+                    path=self.POSTGRES_DB,
+                )
+            )
+        return uris
+
+    # Prometheus metrics at /metrics, set the PROMETHEUS_MULTIPROC_DIR
+    # environment variable when running several workers. Scrapers send
+    # METRICS_TOKEN as a bearer token, without it /metrics is only served in
+    # the local environment
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str | None = None
+
+    # Password hashing, new hashes use the first scheme, hashes made with the
+    # others or with outdated costs are upgraded on the next successful login
+    PASSWORD_SCHEMES: list[Literal["argon2", "bcrypt"]] = ["bcrypt"]
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 2
+    ARGON2_MEMORY_COST: int = 19456  # KiB
+    ARGON2_PARALLELISM: int = 1
+
+    # Password hashing processes per worker process, 0 hashes in the request
+    # thread. Each of the server's worker processes has its own pool, keep
+    # workers * HASH_WORKERS around the number of cores.
+    # Hashes beyond HASH_MAX_PENDING queued per worker are rejected with a 503.
+    # A sync route waiting on a hash holds a thread of the shared thread pool,
+    # so HASH_MAX_PENDING must stay well below THREADPOOL_SIZE, or a burst of
+    # logins would starve every other sync route
+    HASH_WORKERS: int = 2
+    HASH_MAX_PENDING: int = 16
+
+    @model_validator(mode="after")
+    def _check_hash_max_pending(self) -> Self:
+        if self.HASH_MAX_PENDING > THREADPOOL_SIZE // 2:
+            raise ValueError(
+                f"HASH_MAX_PENDING must be at most {THREADPOOL_SIZE // 2}, half "
+                "of the threads that run sync routes"
+            )
+        return self
+
+    # Attempts at logging in, signing up and recovering or resetting passwords,
+    # per client IP and per target email in any RATE_LIMIT_WINDOW_SECONDS, 0
+    # disables the limit. Behind a proxy the server must trust its forwarded
+    # headers (FORWARDED_ALLOW_IPS) or all clients share the proxy's IP.
+    # "memory" limits are per worker process, "redis" ones are shared
+    RATE_LIMIT_BACKEND: Literal["memory", "redis"] = "memory"
+    RATE_LIMIT_PER_IP: int = 20
+    RATE_LIMIT_PER_EMAIL: int = 5
+    RATE_LIMIT_WINDOW_SECONDS: float = 60.0
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+
+    # Serve the items routes with async handlers on an AsyncSession
+    USE_ASYNC_DB: bool = False
+
+    # Responses of at least COMPRESSION_MINIMUM_SIZE bytes are compressed for
+    # clients that accept it. "br" needs the brotli extra installed
+    # (uv sync --extra brotli), without it or for clients that don't accept
+    # Brotli it falls back to gzip
+    COMPRESSION: Literal["off", "gzip", "br"] = "gzip"
+    COMPRESSION_MINIMUM_SIZE: int = 1000
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+
+    # "memory" caches are per worker process, "redis" is shared by all workers.
+    # Deployments with several workers should use "redis", the memory caches
+    # of other workers only see a change once their entry expires
+    CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    # Authenticated users, 0 disables the cache. Defaults to 5 seconds with the
+    # memory backend, as long as other workers may still serve a deactivated
+    # or demoted user
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10_000
+    # Responses of the reads of a user's own items, dropped when the owner's
+    # items change. 0 disables the cache, routes named in
+    # RESPONSE_CACHE_DISABLED_ROUTES (read_items, read_item) are not cached.
+    # Disabled by default with the memory backend, where other workers would
+    # serve outdated responses for up to the TTL
+    RESPONSE_CACHE_TTL_SECONDS: int = 30
+    RESPONSE_CACHE_MAX_SIZE: int = 10_000
+    RESPONSE_CACHE_DISABLED_ROUTES: Annotated[
+        list[str] | str, BeforeValidator(parse_cors)
+    ] = []
+
+    @model_validator(mode="after")
+    def _set_default_cache_ttls(self) -> Self:
+        if self.CACHE_BACKEND == "memory":
+            if "USER_CACHE_TTL_SECONDS" not in self.model_fields_set:
+                self.USER_CACHE_TTL_SECONDS = 5
+            if "RESPONSE_CACHE_TTL_SECONDS" not in self.model_fields_set:
+                self.RESPONSE_CACHE_TTL_SECONDS = 0
+        return self
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -85,12 +222,35 @@ class Settings(BaseSettings):
         return self
 
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
+    # Emails are queued in an outbox and sent by a background worker. The
+    # "database" outbox survives restarts and is shared by all workers, the
+    # "memory" one is per process
+    EMAIL_OUTBOX_BACKEND: Literal["database", "memory"] = "database"
+    # Persistent SMTP connections used by the worker of each process
+    SMTP_POOL_SIZE: int = 2
+    EMAIL_BATCH_SIZE: int = 50
+    EMAIL_POLL_INTERVAL_SECONDS: float = 1.0
+    EMAIL_MAX_ATTEMPTS: int = 5
+    # Delay before the first retry, doubled after each failed attempt
+    EMAIL_RETRY_BACKOFF_SECONDS: float = 5.0
+    # A claimed email is retried after this long if its worker died mid-send
+    EMAIL_SEND_TIMEOUT_SECONDS: float = 60.0
 
     @computed_field  # type: ignore[prop-decorator]
     @property
     def emails_enabled(self) -> bool:
         return bool(self.SMTP_HOST and self.EMAILS_FROM_EMAIL)
 
+    # Users with more than USER_PURGE_THRESHOLD items are deleted in the
+    # background, USER_PURGE_CHUNK_SIZE items per transaction, so that the
+    # request returns at once and no transaction locks all their rows. Purges
+    # of stopped workers are resumed once their lease is over, workers look
+    # for those every USER_PURGE_POLL_INTERVAL_SECONDS
+    USER_PURGE_THRESHOLD: int = 10_000
+    USER_PURGE_CHUNK_SIZE: int = 5_000
+    USER_PURGE_LEASE_SECONDS: float = 60.0
+    USER_PURGE_POLL_INTERVAL_SECONDS: float = 60.0
+
     EMAIL_TEST_USER: EmailStr = "test@example.com"
     FIRST_SUPERUSER: EmailStr
     FIRST_SUPERUSER_PASSWORD: str
@@ -1,10 +1,300 @@
+import logging
+import random
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from prometheus_client import Histogram
+from sqlalchemy import Engine, event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
 from sqlmodel import Session, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import crud
 from app.core.config import settings
-from app.models import User, UserCreate
+from app.core.metrics import DB_POOL_CHECKED_OUT, DB_POOL_SIZE, DB_POOL_WAIT
+from app.models import PoolStatus, User, UserCreate
+
+logger = logging.getLogger(__name__)
+
+
+class _PoolWaitMixin:
+    """
+    Record how long callers wait for a connection to become available.
+    """
+
+    checkouts = 0
+    wait_seconds_total = 0.0
+    wait_seconds_max = 0.0
+    wait_histogram: Histogram | None = None
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()  # type: ignore[misc]
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            if self.wait_histogram is not None:
+                self.wait_histogram.observe(waited)
+
+    def recreate(self) -> Any:
+        # Engine.dispose() replaces the pool
+        pool = super().recreate()  # type: ignore[misc]
+        pool.wait_histogram = self.wait_histogram
+        return pool
+
+
+class TimedQueuePool(_PoolWaitMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_PoolWaitMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(*, is_async: bool = False) -> dict[str, Any]:
+    if settings.DB_PGBOUNCER:
+        return {
+            "poolclass": NullPool,
+            "connect_args": {"prepare_threshold": None},
+        }
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), **engine_options())
+# psycopg 3 serves both engines with the same "postgresql+psycopg" URL
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI), **engine_options(is_async=True)
+)
+replica_engines = [
+    create_engine(str(uri), **engine_options())
+    for uri in settings.replica_database_uris
+]
+async_replica_engines = [
+    create_async_engine(str(uri), **engine_options(is_async=True))
+    for uri in settings.replica_database_uris
+]
+
+
+@dataclass
+class QueryStats:
+    """
+    Statements run through both engines while tracking, see `track_queries`.
+    """
+
+    count: int = 0
+    seconds: float = 0.0
+    # Statements are parameterized, so the same text means the same query shape
+    statements: Counter[str] = field(default_factory=Counter)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count > threshold
+        ]
+
+
+# Copied into the threads running sync routes and into the greenlets of the
+# async engine, the stats object itself is shared with them
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def _before_cursor_execute(
+    _conn: Any, _cursor: Any, _statement: str, _parameters: Any, context: Any, *_: Any
+) -> None:
+    context.query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(
+    _conn: Any, _cursor: Any, statement: str, _parameters: Any, context: Any, *_: Any
+) -> None:
+    elapsed = time.perf_counter() - context.query_start_time
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        stats.statements[statement] += 1
+    if settings.DB_SLOW_QUERY_MS and elapsed * 1000 >= settings.DB_SLOW_QUERY_MS:
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def instrument_pool(name: str, engine: Engine) -> None:
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    event.listen(engine, "checkout", lambda *_: checked_out.inc())
+    event.listen(engine, "checkin", lambda *_: checked_out.dec())
+    if isinstance(engine.pool, QueuePool):
+        DB_POOL_SIZE.labels(name).set(engine.pool.size())
+    if isinstance(engine.pool, _PoolWaitMixin):
+        engine.pool.wait_histogram = DB_POOL_WAIT.labels(name)
+
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+instrument_pool("sync", engine)
+instrument_pool("async", async_engine.sync_engine)
+for index, replica in enumerate(replica_engines):
+    instrument_engine(replica)
+    instrument_pool(f"sync-replica-{index}", replica)
+for index, async_replica in enumerate(async_replica_engines):
+    instrument_engine(async_replica.sync_engine)
+    instrument_pool(f"async-replica-{index}", async_replica.sync_engine)
+
+
+@dataclass
+class ReadRouting:
+    """
+    Where the sessions of a request read, see `route_reads`.
+    """
+
+    # Only requests that don't write may read from a replica
+    use_replica: bool
+    # WAL position of the client's last write, which a replica must have
+    # replayed to serve the client
+    read_after: str | None = None
+    committed: bool = False
+    # WAL position after the writes of this request
+    written: str | None = None
+
+
+# Shared with the threads running sync routes like _query_stats
+_read_routing: ContextVar[ReadRouting | None] = ContextVar("read_routing", default=None)
+
+CURRENT_LSN = text("SELECT pg_current_wal_lsn()::text")
+# A primary has replayed everything it wrote, which lets tests and single
+# server setups use the primary as a replica
+CAUGHT_UP = text(
+    "SELECT CASE WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn()"
+    " ELSE pg_current_wal_lsn() END >= CAST(:lsn AS pg_lsn)"
+)
+
+
+@contextmanager
+def route_reads(use_replica: bool, read_after: str | None) -> Iterator[ReadRouting]:
+    routing = ReadRouting(use_replica=use_replica, read_after=read_after)
+    token = _read_routing.set(routing)
+    try:
+        yield routing
+    finally:
+        _read_routing.reset(token)
+
+
+def get_read_after() -> str | None:
+    """
+    WAL position of the current client's last write, if reads must see it.
+    """
+    routing = _read_routing.get()
+    return None if routing is None else routing.read_after
+
+
+def _after_commit(_session: Session) -> None:
+    routing = _read_routing.get()
+    if routing is not None:
+        routing.committed = True
+
+
+event.listen(Session, "after_commit", _after_commit)
+
+
+def get_read_engine() -> Engine:
+    """
+    The engine for the sessions of the current request: the primary unless the
+    request is routed to a replica, and that replica has caught up with the
+    client's writes.
+    """
+    routing = _read_routing.get()
+    if routing is None or not routing.use_replica or not replica_engines:
+        return engine
+    replica = random.choice(replica_engines)
+    if routing.read_after is None:
+        return replica
+    with replica.connect() as connection:
+        caught_up = connection.scalar(CAUGHT_UP, {"lsn": routing.read_after})
+    return replica if caught_up else engine
+
+
+async def get_async_read_engine() -> AsyncEngine:
+    routing = _read_routing.get()
+    if routing is None or not routing.use_replica or not async_replica_engines:
+        return async_engine
+    replica = random.choice(async_replica_engines)
+    if routing.read_after is None:
+        return replica
+    async with replica.connect() as connection:
+        caught_up = await connection.scalar(CAUGHT_UP, {"lsn": routing.read_after})
+    return replica if caught_up else async_engine
+
+
+def _pending_write() -> ReadRouting | None:
+    routing = _read_routing.get()
+    if (
+        routing is None
+        or not routing.committed
+        or routing.use_replica
+        or not replica_engines
+    ):
+        return None
+    return routing
+
+
+def record_write(session: Session) -> None:
+    """
+    Remember the WAL position after the request's writes, once its session on
+    the primary is done.
+    """
+    routing = _pending_write()
+    if routing is not None:
+        routing.written = session.scalar(CURRENT_LSN)
+
+
+async def record_write_async(session: AsyncSession) -> None:
+    routing = _pending_write()
+    if routing is not None:
+        routing.written = await session.scalar(CURRENT_LSN)
+
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+def get_pool_status(name: str, pool: Pool) -> PoolStatus:
+    status = PoolStatus(name=name, pool_class=type(pool).__name__)
+    if isinstance(pool, QueuePool):
+        status.size = pool.size()
+        status.checked_in = pool.checkedin()
+        status.checked_out = pool.checkedout()
+        status.overflow = pool.overflow()
+    if isinstance(pool, _PoolWaitMixin):
+        status.checkouts = pool.checkouts
+        status.wait_ms_total = pool.wait_seconds_total * 1000
+        status.wait_ms_max = pool.wait_seconds_max * 1000
+    return status
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
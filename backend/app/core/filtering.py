@@ -0,0 +1,122 @@
+import operator
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Annotated, Any
+
+from fastapi import HTTPException, Query
+from sqlalchemy import ColumnElement
+from sqlmodel import col
+
+from app.core.pagination import KeysetModel, SortKey
+
+# Filters and sort keys of the list endpoints, "?filter=field:op:value" (may be
+# repeated, all must match) and "?sort=field" or "?sort=-field" for descending.
+# Only allow-listed fields are accepted, the sortable ones have an (field, id)
+# index so that any page is an index range scan. Items of normal users are
+# listed per owner, their sortable fields have an (owner_id, field, id) index
+# as well.
+
+EQUALITY = frozenset({"eq", "ne", "in"})
+ORDERING = frozenset({"eq", "ne", "lt", "lte", "gt", "gte"})
+
+OPERATORS: dict[str, Callable[[Any, Any], ColumnElement[bool]]] = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+}
+
+FilterQuery = Annotated[
+    list[str] | None,
+    Query(alias="filter", description="field:operator:value, may be repeated"),
+]
+
+
+def parse_bool(value: str) -> bool:
+    if value not in ("true", "false"):
+        raise ValueError(value)
+    return value == "true"
+
+
+def parse_datetime(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        raise ValueError(value)
+    return parsed
+
+
+@dataclass(frozen=True)
+class FilterField:
+    parse: Callable[[str], Any]
+    operators: frozenset[str]
+    sortable: bool = False
+
+
+ITEM_FIELDS = {
+    "owner_id": FilterField(uuid.UUID, frozenset({"eq", "in"})),
+    # The trigram index also serves equality
+    "title": FilterField(str, EQUALITY),
+    "created_at": FilterField(parse_datetime, ORDERING, sortable=True),
+    "updated_at": FilterField(parse_datetime, ORDERING, sortable=True),
+}
+
+USER_FIELDS = {
+    "email": FilterField(str, EQUALITY, sortable=True),
+    "is_active": FilterField(parse_bool, frozenset({"eq"})),
+    "is_superuser": FilterField(parse_bool, frozenset({"eq"})),
+    "created_at": FilterField(parse_datetime, ORDERING, sortable=True),
+    "updated_at": FilterField(parse_datetime, ORDERING, sortable=True),
+}
+
+
+def parse_filter(
+    model: type[KeysetModel], fields: dict[str, FilterField], expression: str
+) -> ColumnElement[bool]:
+    try:
+        name, op, raw_value = expression.split(":", 2)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid filter '{expression}', expected field:operator:value",
+        )
+    field = fields.get(name)
+    if field is None:
+        raise HTTPException(status_code=400, detail=f"Can't filter by '{name}'")
+    if op not in field.operators:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported operator '{op}' for '{name}'",
+        )
+    try:
+        if op == "in":
+            values = [field.parse(value) for value in raw_value.split(",")]
+        else:
+            value = field.parse(raw_value)
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid value '{raw_value}' for '{name}'"
+        )
+    column = col(getattr(model, name))
+    if op == "in":
+        return column.in_(values)
+    return OPERATORS[op](column, value)
+
+
+def parse_filters(
+    model: type[KeysetModel], fields: dict[str, FilterField], filters: list[str]
+) -> list[ColumnElement[bool]]:
+    return [parse_filter(model, fields, expression) for expression in filters]
+
+
+def parse_sort(fields: dict[str, FilterField], sort: str | None) -> SortKey:
+    if not sort:
+        return SortKey()
+    name = sort.removeprefix("-")
+    field = fields.get(name)
+    if field is None or not field.sortable:
+        raise HTTPException(status_code=400, detail=f"Can't sort by '{name}'")
+    return SortKey(field=name, descending=sort.startswith("-"))
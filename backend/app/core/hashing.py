@@ -0,0 +1,136 @@
+import multiprocessing
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+from passlib.context import CryptContext
+
+# Password hashing is CPU bound, it runs in a pool of worker processes so that it
+# scales with cores and doesn't hold the GIL of the API process. This module is
+# imported by the workers, keep its imports light.
+
+_worker_context: CryptContext | None = None
+
+
+def _init_worker(context_kwargs: dict[str, Any]) -> None:
+    global _worker_context
+    _worker_context = CryptContext(**context_kwargs)
+
+
+def _hash(password: str) -> str:
+    assert _worker_context
+    return _worker_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    assert _worker_context
+    return _worker_context.verify(plain_password, hashed_password)
+
+
+def _timed(
+    fn: Callable[..., Any], submitted_at: float, *args: Any
+) -> tuple[Any, float, float]:
+    # Wall clock, the submitting process' monotonic clock isn't available here
+    started_at = time.time()
+    result = fn(*args)
+    return result, max(started_at - submitted_at, 0.0), time.time() - started_at
+
+
+# Called with the operation, the seconds spent queued and the seconds spent hashing
+HashObserver = Callable[[str, float, float], None]
+
+
+class HashQueueFull(Exception):
+    pass
+
+
+class HashingService:
+    """
+    Bounded process pool for password hashing.
+
+    At most `max_pending` hashes are queued or running at once, further
+    submissions raise `HashQueueFull` right away instead of waiting.
+    """
+
+    def __init__(
+        self,
+        context_kwargs: dict[str, Any],
+        *,
+        max_workers: int,
+        max_pending: int,
+        observer: HashObserver | None = None,
+    ) -> None:
+        self.context_kwargs = context_kwargs
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.observer = observer
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Started on first use so importing the app doesn't spawn processes
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                # Forking a process that runs threads isn't safe
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.context_kwargs,),
+            )
+        return self._executor
+
+    def _done(self, operation: str, timed: Future[Any], future: Future[Any]) -> None:
+        with self._lock:
+            self.pending -= 1
+        if timed.cancelled():
+            future.cancel()
+            return
+        if not future.set_running_or_notify_cancel():
+            return
+        if (exception := timed.exception()) is not None:
+            future.set_exception(exception)
+            return
+        result, queued, duration = timed.result()
+        if self.observer is not None:
+            self.observer(operation, queued, duration)
+        future.set_result(result)
+
+    def _submit(
+        self, operation: str, fn: Callable[..., Any], *args: Any
+    ) -> Future[Any]:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise HashQueueFull()
+            self.pending += 1
+            try:
+                try:
+                    timed = self._get_executor().submit(_timed, fn, time.time(), *args)
+                except BrokenProcessPool:
+                    # A worker died, start a fresh pool instead of failing forever
+                    self._executor = None
+                    timed = self._get_executor().submit(_timed, fn, time.time(), *args)
+            except BaseException:
+                self.pending -= 1
+                raise
+        # Resolved with the bare result once the timings are taken out, and
+        # cancelling it cancels the hash if it hasn't started yet
+        future: Future[Any] = Future()
+        future.add_done_callback(lambda f: f.cancelled() and timed.cancel())
+        timed.add_done_callback(lambda t: self._done(operation, t, future))
+        return future
+
+    def hash(self, password: str) -> "Future[str]":
+        return self._submit("hash", _hash, password)
+
+    def verify(self, plain_password: str, hashed_password: str) -> "Future[bool]":
+        return self._submit("verify", _verify, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
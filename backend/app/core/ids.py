@@ -0,0 +1,53 @@
+import secrets
+import threading
+import time
+import uuid
+
+from app.core.config import settings
+
+# Bits of the counter that follows the timestamp in a UUIDv7
+COUNTER_BITS = 42
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7() -> uuid.UUID:
+    """
+    UUID version 7 (RFC 9562): a 48 bit Unix timestamp in milliseconds, then a
+    42 bit counter and 32 random bits. The counter starts at a random value
+    each millisecond and is incremented within it, so the ids of a process
+    are strictly increasing, even if the clock goes back.
+    """
+    global _last_ms, _counter
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            # Leave half of the counter's range for the ids of this millisecond
+            _counter = secrets.randbits(COUNTER_BITS - 1)
+        else:
+            _counter += 1
+            if _counter >> COUNTER_BITS:
+                _last_ms += 1
+                _counter = 0
+        ms, counter = _last_ms, _counter
+    value = (
+        (ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76
+        | (counter >> 30) << 64
+        | 0b10 << 62
+        | (counter & 0x3FFF_FFFF) << 32
+        | secrets.randbits(32)
+    )
+    return uuid.UUID(int=value)
+
+
+def new_id() -> uuid.UUID:
+    """
+    Primary key for a new row, of the ID_GENERATOR kind.
+    """
+    if settings.ID_GENERATOR == "uuid7":
+        return uuid7()
+    return uuid.uuid4()
@@ -0,0 +1,172 @@
+import os
+import secrets
+import time
+from collections.abc import Callable, Iterator
+
+from fastapi import HTTPException, Request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# With several workers (fastapi run --workers N) each process writes its samples
+# to files in PROMETHEUS_MULTIPROC_DIR, any worker serving /metrics aggregates
+# them. The directory must be emptied before the server starts, see Dockerfile.
+# Without it the metrics are those of the serving process only.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+if MULTIPROCESS:
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+else:
+    registry = REGISTRY
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to the end of the response, by route, method and status code.",
+    ["route", "method", "status"],
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Connections kept open by the pools.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pools.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time waited for a connection to become available.",
+    ["pool"],
+    buckets=(0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Time spent hashing or verifying a password.",
+    ["operation"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+PASSWORD_HASH_QUEUE = Histogram(
+    "password_hash_queue_seconds",
+    "Time a password hash waited for a hashing process.",
+    ["operation"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected",
+    "Password hashes rejected because too many were pending.",
+)
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "response_cache_lookups",
+    "Response cache lookups, by route and result (hit or miss).",
+    ["route", "result"],
+)
+RATE_LIMITED = Counter(
+    "rate_limited",
+    "Attempts rejected by the rate limiter, by action.",
+    ["action"],
+)
+
+
+class ScrapeGauge(Collector):
+    """
+    Gauge read when scraped, for values every process sees the same way.
+    """
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+
+    def collect(self) -> Iterator[Metric]:
+        yield GaugeMetricFamily(self.name, self.documentation, value=self.read())
+
+
+def register_scrape_gauge(
+    name: str, documentation: str, read: Callable[[], float]
+) -> None:
+    registry.register(ScrapeGauge(name, documentation, read))
+
+
+def observe_password_hash(operation: str, queued: float, duration: float) -> None:
+    PASSWORD_HASH_QUEUE.labels(operation).observe(queued)
+    PASSWORD_HASH_DURATION.labels(operation).observe(duration)
+
+
+def mark_process_dead() -> None:
+    # Drops the live gauges of this worker from the aggregate
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())  # type: ignore[no-untyped-call]
+
+
+def check_metrics_token(request: Request) -> None:
+    """
+    Only the scraper may read the metrics: with METRICS_TOKEN set it must send
+    it as a bearer token, without it the metrics are only served locally.
+    """
+    if settings.METRICS_TOKEN is None:
+        if settings.ENVIRONMENT != "local":
+            raise HTTPException(status_code=404, detail="Not Found")
+        return
+    authorization = request.headers.get("Authorization", "")
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    if not secrets.compare_digest(authorization.encode(), expected.encode()):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def metrics(request: Request) -> Response:
+    check_metrics_token(request)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+class MetricsMiddleware:
+    """
+    Record the duration of each request in REQUEST_DURATION, labelled with the
+    unique id of the matched route or "unmatched".
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            REQUEST_DURATION.labels(
+                getattr(route, "unique_id", "unmatched"), scope["method"], status
+            ).observe(time.perf_counter() - start)
@@ -0,0 +1,353 @@
+import logging
+import queue
+import threading
+import uuid
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Protocol
+
+from sqlalchemy import case
+from sqlmodel import Session, col, delete, func, select, update
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.metrics import register_scrape_gauge
+from app.models import EmailOutbox, get_datetime_utc
+
+logger = logging.getLogger(__name__)
+
+
+class Outbox(Protocol):
+    def enqueue(self, message: EmailOutbox) -> None: ...
+
+    def claim(self, limit: int) -> list[EmailOutbox]: ...
+
+    def mark_sent(self, ids: list[uuid.UUID]) -> None: ...
+
+    def mark_failed(
+        self, id: uuid.UUID, error: str, next_attempt_at: datetime
+    ) -> None: ...
+
+    def depth(self) -> int:
+        """
+        Number of emails not sent yet that have attempts left.
+        """
+        ...
+
+
+class MemoryOutbox:
+    """
+    Per-process outbox, queued emails are lost when the process exits.
+    """
+
+    def __init__(self) -> None:
+        self._messages: dict[uuid.UUID, EmailOutbox] = {}
+        self._lock = threading.Lock()
+
+    def enqueue(self, message: EmailOutbox) -> None:
+        with self._lock:
+            self._messages[message.id] = message
+
+    def claim(self, limit: int) -> list[EmailOutbox]:
+        now = get_datetime_utc()
+        with self._lock:
+            due = sorted(
+                (
+                    message
+                    for message in self._messages.values()
+                    if message.attempts < settings.EMAIL_MAX_ATTEMPTS
+                    and message.next_attempt_at <= now
+                ),
+                key=lambda message: message.next_attempt_at,
+            )[:limit]
+            for message in due:
+                message.attempts += 1
+                message.next_attempt_at = now + timedelta(
+                    seconds=settings.EMAIL_SEND_TIMEOUT_SECONDS
+                )
+            return [message.model_copy() for message in due]
+
+    def mark_sent(self, ids: list[uuid.UUID]) -> None:
+        with self._lock:
+            for id in ids:
+                self._messages.pop(id, None)
+
+    def mark_failed(self, id: uuid.UUID, error: str, next_attempt_at: datetime) -> None:
+        with self._lock:
+            message = self._messages.get(id)
+            if message is not None:
+                message.last_error = error
+                message.next_attempt_at = next_attempt_at
+                if message.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+                    message.context = {}
+
+    def depth(self) -> int:
+        with self._lock:
+            return sum(
+                message.attempts < settings.EMAIL_MAX_ATTEMPTS
+                for message in self._messages.values()
+            )
+
+
+class DatabaseOutbox:
+    """
+    Outbox table shared by every worker. Sent emails are deleted, emails that
+    ran out of attempts are kept with their last error and without their
+    context.
+    """
+
+    def enqueue(self, message: EmailOutbox) -> None:
+        with Session(engine) as session:
+            session.add(message)
+            session.commit()
+
+    def claim(self, limit: int) -> list[EmailOutbox]:
+        # Lease the due rows in one statement, SKIP LOCKED lets the workers of
+        # other processes claim different rows concurrently
+        now = get_datetime_utc()
+        due = (
+            select(EmailOutbox.id)
+            .where(
+                col(EmailOutbox.attempts) < settings.EMAIL_MAX_ATTEMPTS,
+                col(EmailOutbox.next_attempt_at) <= now,
+            )
+            .order_by(col(EmailOutbox.next_attempt_at))
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            update(EmailOutbox)
+            .where(col(EmailOutbox.id).in_(due.scalar_subquery()))
+            .values(
+                attempts=col(EmailOutbox.attempts) + 1,
+                next_attempt_at=now
+                + timedelta(seconds=settings.EMAIL_SEND_TIMEOUT_SECONDS),
+            )
+            .returning(EmailOutbox)
+        )
+        with Session(engine, expire_on_commit=False) as session:
+            messages = list(session.scalars(statement))
+            session.commit()
+        return messages
+
+    def mark_sent(self, ids: list[uuid.UUID]) -> None:
+        with Session(engine) as session:
+            session.exec(delete(EmailOutbox).where(col(EmailOutbox.id).in_(ids)))  # type: ignore
+            session.commit()
+
+    def mark_failed(self, id: uuid.UUID, error: str, next_attempt_at: datetime) -> None:
+        statement = (
+            update(EmailOutbox)
+            .where(col(EmailOutbox.id) == id)
+            .values(
+                last_error=error,
+                next_attempt_at=next_attempt_at,
+                context=case(
+                    (
+                        col(EmailOutbox.attempts) >= settings.EMAIL_MAX_ATTEMPTS,
+                        func.jsonb_build_object(),
+                    ),
+                    else_=col(EmailOutbox.context),
+                ),
+            )
+        )
+        with Session(engine) as session:
+            session.exec(statement)  # type: ignore
+            session.commit()
+
+    def depth(self) -> int:
+        statement = select(func.count()).where(
+            col(EmailOutbox.attempts) < settings.EMAIL_MAX_ATTEMPTS
+        )
+        with Session(engine) as session:
+            return session.exec(statement).one()
+
+
+def get_outbox() -> Outbox:
+    if settings.EMAIL_OUTBOX_BACKEND == "memory":
+        return MemoryOutbox()
+    return DatabaseOutbox()
+
+
+def get_smtp_options() -> dict[str, Any]:
+    smtp_options: dict[str, Any] = {
+        "host": settings.SMTP_HOST,
+        "port": settings.SMTP_PORT,
+    }
+    if settings.SMTP_TLS:
+        smtp_options["tls"] = True
+    elif settings.SMTP_SSL:
+        smtp_options["ssl"] = True
+    if settings.SMTP_USER:
+        smtp_options["user"] = settings.SMTP_USER
+    if settings.SMTP_PASSWORD:
+        smtp_options["password"] = settings.SMTP_PASSWORD
+    return smtp_options
+
+
+class SMTPPool:
+    """
+    Fixed set of SMTP connections kept open between emails, so the handshake,
+    TLS and login are paid once per connection instead of once per email.
+    Connections are opened on first use and reopened when the server drops them.
+    """
+
+    def __init__(self, size: int, smtp_options: dict[str, Any]) -> None:
+        # emails is slow to import and only needed by the worker
+        from emails.backend import SMTPBackend  # type: ignore
+
+        self.size = size
+        self._backends: queue.Queue[Any] = queue.Queue()
+        for _ in range(size):
+            self._backends.put(SMTPBackend(fail_silently=False, **smtp_options))
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        backend = self._backends.get()
+        try:
+            yield backend
+        finally:
+            self._backends.put(backend)
+
+    def close(self) -> None:
+        for _ in range(self.size):
+            backend = self._backends.get()
+            backend.close()
+            self._backends.put(backend)
+
+
+def get_retry_delay(attempts: int) -> timedelta:
+    return timedelta(
+        seconds=settings.EMAIL_RETRY_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0)
+    )
+
+
+class EmailWorker:
+    """
+    Background thread that sends the due emails of an outbox in batches,
+    spread over the connections of an SMTP pool.
+    """
+
+    def __init__(self, outbox: Outbox, smtp_pool: SMTPPool) -> None:
+        self.outbox = outbox
+        self.smtp_pool = smtp_pool
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._senders = ThreadPoolExecutor(
+            max_workers=smtp_pool.size, thread_name_prefix="smtp"
+        )
+
+    def _send(self, message: EmailOutbox) -> str | None:
+        import emails  # type: ignore
+
+        # app.utils queues its emails through this module
+        from app.utils import render_email
+
+        try:
+            email = emails.Message(
+                subject=message.subject,
+                html=render_email(message.template_name, message.context),
+                mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
+            )
+            with self.smtp_pool.connection() as smtp:
+                email.send(to=message.email_to, smtp=smtp)
+        except Exception as e:
+            return repr(e)
+        return None
+
+    def run_once(self) -> int:
+        """
+        Send one batch of due emails, returns how many were claimed.
+        """
+        messages = self.outbox.claim(settings.EMAIL_BATCH_SIZE)
+        if not messages:
+            return 0
+        errors = list(self._senders.map(self._send, messages))
+        sent = []
+        for message, error in zip(messages, errors, strict=True):
+            if error is None:
+                sent.append(message.id)
+                continue
+            logger.warning(
+                f"Email {message.id} failed, attempt {message.attempts}: {error}"
+            )
+            self.outbox.mark_failed(
+                message.id,
+                error,
+                get_datetime_utc() + get_retry_delay(message.attempts),
+            )
+        if sent:
+            self.outbox.mark_sent(sent)
+        return len(messages)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception:
+                logger.exception("Email worker failed to process the outbox")
+                claimed = 0
+            # Keep draining while there is a backlog
+            if claimed < settings.EMAIL_BATCH_SIZE:
+                self._wakeup.wait(settings.EMAIL_POLL_INTERVAL_SECONDS)
+                self._wakeup.clear()
+
+    def wakeup(self) -> None:
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="email-worker", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+        self._senders.shutdown()
+        self.smtp_pool.close()
+
+
+outbox = get_outbox()
+# Per process with the memory outbox
+register_scrape_gauge("email_outbox_depth", "Emails waiting to be sent.", outbox.depth)
+email_worker: EmailWorker | None = None
+
+
+def enqueue_email(
+    *, email_to: str, subject: str, template_name: str, context: dict[str, Any]
+) -> None:
+    outbox.enqueue(
+        EmailOutbox(
+            email_to=email_to,
+            subject=subject,
+            template_name=template_name,
+            context=context,
+        )
+    )
+    if email_worker is not None:
+        email_worker.wakeup()
+
+
+def start_email_worker() -> None:
+    global email_worker
+    if email_worker is None:
+        email_worker = EmailWorker(
+            outbox, SMTPPool(settings.SMTP_POOL_SIZE, get_smtp_options())
+        )
+        email_worker.start()
+
+
+def stop_email_worker() -> None:
+    global email_worker
+    if email_worker is not None:
+        email_worker.stop()
+        email_worker = None
@@ -0,0 +1,137 @@
+import base64
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, TypeVar
+
+from fastapi import HTTPException
+from sqlalchemy import ColumnElement, text
+from sqlalchemy.orm import Session
+from sqlmodel import and_, col, func, or_, select
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.models import CountMode, Item, User
+
+# Keyset pagination orders rows by a sort key and then by id, both columns are
+# covered by composite indexes so "WHERE (created_at, id) > (...)" is an index
+# range scan no matter how deep the page is.
+KeysetModel = TypeVar("KeysetModel", Item, User)
+
+
+@dataclass(frozen=True)
+class SortKey:
+    field: str = "created_at"
+    descending: bool = False
+
+    def __str__(self) -> str:
+        return f"-{self.field}" if self.descending else self.field
+
+
+def encode_cursor(row: Item | User, sort: SortKey) -> str:
+    value = getattr(row, sort.field)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([str(sort), value, str(row.id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str, model: type[KeysetModel], sort: SortKey
+) -> tuple[Any, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, id_ = json.loads(base64.urlsafe_b64decode(padded))
+        # A cursor is only valid for the order it was created with
+        if cursor_sort != str(sort):
+            raise ValueError(cursor_sort)
+        if model.model_fields[sort.field].annotation is datetime:
+            value = datetime.fromisoformat(value)
+        return value, uuid.UUID(id_)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(
+    statement: SelectOfScalar[Any],
+    model: type[KeysetModel],
+    *,
+    skip: int,
+    limit: int,
+    after: str | None,
+    sort: SortKey = SortKey(),
+) -> SelectOfScalar[Any]:
+    """
+    Order a select by the keyset and apply the page window.
+
+    One extra row is fetched so the caller can tell whether a next page exists,
+    see `page_with_cursor`.
+    """
+    key = col(getattr(model, sort.field))
+    id_column = col(model.id)
+    if after:
+        value, id_ = decode_cursor(after, model, sort)
+        if sort.descending:
+            statement = statement.where(
+                or_(key < value, and_(key == value, id_column < id_))
+            )
+        else:
+            statement = statement.where(
+                or_(key > value, and_(key == value, id_column > id_))
+            )
+    if sort.descending:
+        statement = statement.order_by(key.desc(), id_column.desc())
+    else:
+        statement = statement.order_by(key, id_column)
+    return statement.offset(skip).limit(limit + 1)
+
+
+def page_with_cursor(
+    rows: list[KeysetModel], limit: int, sort: SortKey = SortKey()
+) -> tuple[list[KeysetModel], str | None]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1], sort)
+
+
+def count_rows(
+    session: Session,
+    model: type[KeysetModel],
+    *whereclause: ColumnElement[bool],
+    mode: CountMode,
+) -> int | None:
+    """
+    Count the rows of a listing according to the requested count mode.
+
+    "estimated" reads the table statistics for unfiltered listings and the
+    planner's row estimate otherwise, neither of which visits the rows.
+    """
+    if mode == "none":
+        return None
+    if mode == "estimated":
+        if whereclause:
+            statement = select(model).where(*whereclause)
+            # Expanding IN parameters are only rendered into the SQL string when
+            # asked for, the default leaves a placeholder for the execution step
+            compiled = statement.compile(
+                dialect=session.get_bind().dialect,
+                compile_kwargs={"render_postcompile": True},
+            )
+            plan = (
+                session.connection()
+                .exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params)
+                .scalar_one()
+            )
+            return int(plan[0]["Plan"]["Plan Rows"])
+        reltuples = session.execute(
+            text(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"
+            ),
+            {"name": f'"{model.__tablename__}"'},
+        ).scalar_one_or_none()
+        # reltuples is -1 until the table has been vacuumed or analyzed
+        if reltuples is not None and reltuples >= 0:
+            return int(reltuples)
+    count_statement = select(func.count()).select_from(model).where(*whereclause)
+    return session.execute(count_statement).scalar_one()
@@ -0,0 +1,136 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+from fastapi import HTTPException, Request
+
+from app.core.config import settings
+from app.core.metrics import RATE_LIMITED
+
+# Token buckets: a bucket holds up to `limit` attempts and refills continuously
+# at `limit` per window, so over any window at most about `limit` attempts get
+# through while a short burst of legitimate retries is still allowed.
+
+
+class RateLimiterBackend(Protocol):
+    def acquire(self, key: str, limit: int, window: float) -> float:
+        """
+        Take a token from the bucket of `key`, returns 0 when one was available
+        or else the seconds until the next one.
+        """
+        ...
+
+
+class MemoryRateLimiter:
+    """
+    Per-process buckets, the least recently used are dropped past `max_keys`.
+    """
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        # Sync routes run in a thread pool
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, limit: int, window: float) -> float:
+        now = time.monotonic()
+        rate = limit / window
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (limit, now))
+            tokens = min(limit, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+# Runs atomically on the server, with the server's clock so that the workers'
+# clocks don't need to agree. Lua numbers are truncated to integers in replies,
+# hence the string.
+REDIS_ACQUIRE = """
+local limit = tonumber(ARGV[1])
+local rate = limit / tonumber(ARGV[2])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated_at")
+local tokens = tonumber(bucket[1]) or limit
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(limit, tokens + (now - updated_at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tokens, "updated_at", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(tonumber(ARGV[2]) * 1000))
+return tostring(wait)
+"""
+
+
+class RedisRateLimiter:
+    """
+    Buckets shared by every worker, expired once they would be full again.
+    """
+
+    def __init__(self, url: str, namespace: str) -> None:
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.namespace = namespace
+        self._acquire = self.client.register_script(REDIS_ACQUIRE)
+
+    def acquire(self, key: str, limit: int, window: float) -> float:
+        wait = self._acquire(keys=[f"{self.namespace}:{key}"], args=[limit, window])
+        return float(wait)
+
+
+def get_rate_limiter() -> RateLimiterBackend:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimiter(settings.REDIS_URL, "rate-limit")
+    return MemoryRateLimiter(settings.RATE_LIMIT_MAX_KEYS)
+
+
+rate_limiter = get_rate_limiter()
+
+
+def get_client_ip(request: Request) -> str:
+    # The proxy's address unless the server trusts its forwarded headers
+    return request.client.host if request.client else "unknown"
+
+
+def check_rate_limit(request: Request, action: str, email: str | None) -> None:
+    """
+    Count an attempt at `action` against the client's IP and the target email,
+    raise a 429 when either is over its limit.
+
+    Called before any password hashing, so rejected attempts cost no CPU.
+    """
+    window = settings.RATE_LIMIT_WINDOW_SECONDS
+    buckets = [(f"{action}:ip:{get_client_ip(request)}", settings.RATE_LIMIT_PER_IP)]
+    if email:
+        buckets.append(
+            (f"{action}:email:{email.lower()}", settings.RATE_LIMIT_PER_EMAIL)
+        )
+    wait = max(
+        (rate_limiter.acquire(key, limit, window) for key, limit in buckets if limit),
+        default=0.0,
+    )
+    if wait:
+        RATE_LIMITED.labels(action).inc()
+        raise HTTPException(
+            status_code=429,
+            detail="Too many attempts, try again later",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
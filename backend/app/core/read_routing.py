@@ -0,0 +1,47 @@
+import re
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.db import route_reads
+
+READ_AFTER_COOKIE = "read_after"
+READ_METHODS = {"GET", "HEAD"}
+# As formatted by Postgres, e.g. 0/16B3748
+LSN = re.compile(r"[0-9A-F]{1,8}/[0-9A-F]{1,8}")
+
+
+class ReadRoutingMiddleware:
+    """
+    Route the sessions of GET and HEAD requests to the replicas, and after a
+    request that wrote, set a cookie with the primary's WAL position for
+    `max_age` seconds. Reads with the cookie go to a replica that has replayed
+    that position, so clients see their own writes.
+    """
+
+    def __init__(self, app: ASGIApp, *, max_age: int) -> None:
+        self.app = app
+        self.max_age = max_age
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        read_after = HTTPConnection(scope).cookies.get(READ_AFTER_COOKIE)
+        if read_after is not None and not LSN.fullmatch(read_after):
+            read_after = None
+
+        with route_reads(scope["method"] in READ_METHODS, read_after) as routing:
+
+            async def send_with_cookie(message: Message) -> None:
+                if message["type"] == "http.response.start" and routing.written:
+                    MutableHeaders(scope=message).append(
+                        "Set-Cookie",
+                        f"{READ_AFTER_COOKIE}={routing.written}; "
+                        f"Max-Age={self.max_age}; Path=/; HttpOnly; SameSite=lax",
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,93 @@
+import uuid
+from urllib.parse import urlencode
+
+from fastapi import Request
+
+from app.core import db
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.core.metrics import RESPONSE_CACHE_LOOKUPS
+from app.models import UserPublic
+
+# Response bodies of the reads of a user's own items, by user, path and query.
+# Each entry records the owner it depends on and the owner's version when it
+# was computed. Changing an owner's items drops its version, the next read
+# makes a new one and the entries of the old version are no longer used.
+# Superusers read the items of every owner, their reads aren't cached. Nor are
+# the reads of clients that wrote recently: a response computed on a replica
+# that lagged behind their write may have been stored under the new version.
+response_cache = get_cache("response", settings.RESPONSE_CACHE_MAX_SIZE)
+
+
+def _version_key(owner_id: uuid.UUID) -> str:
+    return f"owner:{owner_id}"
+
+
+def get_owner_version(owner_id: uuid.UUID) -> str:
+    key = _version_key(owner_id)
+    version: str | None = response_cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        # Another worker may have made one meanwhile
+        if not response_cache.add(key, version, settings.RESPONSE_CACHE_TTL_SECONDS):
+            version = response_cache.get(key) or version
+    return version
+
+
+def invalidate_owner(owner_id: uuid.UUID) -> None:
+    """
+    Drop the cached responses that depend on the items of `owner_id`, call after
+    committing changes to them.
+    """
+    response_cache.delete(_version_key(owner_id))
+
+
+class ResponseCache:
+    """
+    The cached response body of the current read, if the route caches the
+    reads of this user.
+    """
+
+    def __init__(self, request: Request, user: UserPublic) -> None:
+        self.route = request.scope["route"].name
+        self.enabled = (
+            bool(settings.RESPONSE_CACHE_TTL_SECONDS)
+            and not user.is_superuser
+            and self.route not in settings.RESPONSE_CACHE_DISABLED_ROUTES
+            and db.get_read_after() is None
+        )
+        if not self.enabled:
+            return
+        self.owner_id = str(user.id)
+        query = urlencode(sorted(request.query_params.multi_items()))
+        self.key = f"response:{user.id}:{request.url.path}?{query}"
+        # Read before the database is, a change committed in between drops
+        # this version and the response computed with it is never served
+        self.version = get_owner_version(user.id)
+
+    def get(self) -> bytes | None:
+        if not self.enabled:
+            return None
+        entry = response_cache.get(self.key)
+        if (
+            entry is None
+            or entry["owner_id"] != self.owner_id
+            or entry["version"] != self.version
+        ):
+            RESPONSE_CACHE_LOOKUPS.labels(self.route, "miss").inc()
+            return None
+        RESPONSE_CACHE_LOOKUPS.labels(self.route, "hit").inc()
+        body: str = entry["body"]
+        return body.encode()
+
+    def set(self, body: bytes | memoryview) -> None:
+        if self.enabled:
+            response_cache.set(
+                self.key,
+                {
+                    "owner_id": self.owner_id,
+                    "version": self.version,
+                    "body": str(body, "utf-8"),
+                },
+                settings.RESPONSE_CACHE_TTL_SECONDS,
+            )
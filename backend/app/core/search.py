@@ -0,0 +1,45 @@
+from typing import Any
+
+from sqlalchemy import ColumnElement, func
+from sqlmodel import col, or_
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.models import ITEM_SEARCH_CONFIG, Item, item_search_vector
+
+# Item search combines the full-text index on title and description (words,
+# quoted phrases, "or" and -exclusions, as in websearch_to_tsquery) with the
+# trigram index on the title for prefixes and substrings. Both predicates are
+# served by their GIN index, Postgres ORs the two bitmaps.
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def item_search_filter(q: str) -> ColumnElement[bool]:
+    tsquery = func.websearch_to_tsquery(ITEM_SEARCH_CONFIG, q)
+    return or_(
+        item_search_vector.bool_op("@@")(tsquery),
+        col(Item.title).ilike(f"%{escape_like(q)}%", escape="\\"),
+    )
+
+
+def item_search_rank(q: str) -> ColumnElement[float]:
+    tsquery = func.websearch_to_tsquery(ITEM_SEARCH_CONFIG, q)
+    return func.ts_rank_cd(item_search_vector, tsquery) + func.similarity(
+        col(Item.title), q
+    )
+
+
+def search_items(
+    statement: SelectOfScalar[Any], q: str, *, skip: int, limit: int
+) -> SelectOfScalar[Any]:
+    """
+    Filter a select of items by a search query, best matches first.
+    """
+    return (
+        statement.where(item_search_filter(q))
+        .order_by(item_search_rank(q).desc(), col(Item.id))
+        .offset(skip)
+        .limit(limit)
+    )
@@ -1,16 +1,54 @@
+from collections.abc import Callable
+from concurrent.futures import Future
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, TypeVar
 
 import jwt
+from fastapi import HTTPException
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.hashing import HashingService, HashQueueFull
+from app.core.metrics import (
+    PASSWORD_HASH_DURATION,
+    PASSWORD_HASH_REJECTED,
+    observe_password_hash,
+)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def get_pwd_context_kwargs(
+    schemes: list[str],
+    *,
+    bcrypt_rounds: int = settings.BCRYPT_ROUNDS,
+    argon2_time_cost: int = settings.ARGON2_TIME_COST,
+    argon2_memory_cost: int = settings.ARGON2_MEMORY_COST,
+    argon2_parallelism: int = settings.ARGON2_PARALLELISM,
+) -> dict[str, Any]:
+    kwargs: dict[str, Any] = {"schemes": schemes, "deprecated": "auto"}
+    if "bcrypt" in schemes:
+        kwargs["bcrypt__rounds"] = bcrypt_rounds
+    if "argon2" in schemes:
+        kwargs["argon2__type"] = "ID"
+        kwargs["argon2__time_cost"] = argon2_time_cost
+        kwargs["argon2__memory_cost"] = argon2_memory_cost
+        kwargs["argon2__parallelism"] = argon2_parallelism
+    return kwargs
+
+
+PWD_CONTEXT_KWARGS = get_pwd_context_kwargs(list(settings.PASSWORD_SCHEMES))
+pwd_context = CryptContext(**PWD_CONTEXT_KWARGS)
+hashing_service = HashingService(
+    PWD_CONTEXT_KWARGS,
+    max_workers=settings.HASH_WORKERS or 1,
+    max_pending=settings.HASH_MAX_PENDING,
+    observer=observe_password_hash,
+)
 
 
 ALGORITHM = "HS256"
 
+T = TypeVar("T")
+
 
 def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
     expire = datetime.now(timezone.utc) + expires_delta
@@ -19,9 +57,34 @@ def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
     return encoded_jwt
 
 
+def _submit(submit: Callable[..., "Future[T]"], *args: str) -> "Future[T]":
+    try:
+        return submit(*args)
+    except HashQueueFull:
+        PASSWORD_HASH_REJECTED.inc()
+        raise HTTPException(
+            status_code=503,
+            detail="Too many password hashing requests, try again later",
+            headers={"Retry-After": "1"},
+        )
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    if not settings.HASH_WORKERS:
+        with PASSWORD_HASH_DURATION.labels("verify").time():
+            return pwd_context.verify(plain_password, hashed_password)
+    return _submit(hashing_service.verify, plain_password, hashed_password).result()
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    if not settings.HASH_WORKERS:
+        with PASSWORD_HASH_DURATION.labels("hash").time():
+            return pwd_context.hash(password)
+    return _submit(hashing_service.hash, password).result()
+
+
+def password_needs_update(hashed_password: str) -> bool:
+    """
+    Whether the hash uses a deprecated scheme or outdated cost parameters.
+    """
+    return pwd_context.needs_update(hashed_password)
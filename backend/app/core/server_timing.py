@@ -0,0 +1,48 @@
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.db import QueryStats, track_queries
+
+logger = logging.getLogger(__name__)
+
+
+def format_server_timing(stats: QueryStats) -> str:
+    return f'db;dur={stats.seconds * 1000:.3f};desc="{stats.count} queries"'
+
+
+class QueryStatsMiddleware:
+    """
+    Report the statements of each request in a Server-Timing header, as run
+    until the response starts, and warn about statements repeated more than
+    `repeated_threshold` times.
+    """
+
+    def __init__(self, app: ASGIApp, *, repeated_threshold: int) -> None:
+        self.app = app
+        self.repeated_threshold = repeated_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", format_server_timing(stats))
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+
+        for statement, count in stats.repeated(self.repeated_threshold):
+            logger.warning(
+                "%s %s ran the same statement %d times, likely an N+1 query: %s",
+                scope["method"],
+                scope["path"],
+                count,
+                statement,
+            )
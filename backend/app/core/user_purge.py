@@ -0,0 +1,175 @@
+import logging
+import threading
+import uuid
+from datetime import timedelta
+
+from sqlmodel import Session, col, delete, select, update
+
+from app.core.cache import invalidate_user
+from app.core.config import settings
+from app.core.db import engine
+from app.core.response_cache import invalidate_owner
+from app.models import Item, User, UserPurge, get_datetime_utc
+
+logger = logging.getLogger(__name__)
+
+
+def delete_user(*, session: Session, db_user: User) -> bool:
+    """
+    Delete the user, their items are deleted by the database. A user with more
+    than USER_PURGE_THRESHOLD items is deactivated and queued for the purge
+    worker instead, returns whether that's the case.
+    """
+    queued = db_user.item_count > settings.USER_PURGE_THRESHOLD
+    if queued:
+        db_user.is_active = False
+        session.add(db_user)
+        if session.get(UserPurge, db_user.id) is None:
+            session.add(UserPurge(user_id=db_user.id))
+    else:
+        session.delete(db_user)
+    session.commit()
+    invalidate_user(db_user.id)
+    invalidate_owner(db_user.id)
+    if queued and purge_worker is not None:
+        purge_worker.wakeup()
+    return queued
+
+
+def get_lease_duration() -> timedelta:
+    return timedelta(seconds=settings.USER_PURGE_LEASE_SECONDS)
+
+
+def claim_purge() -> uuid.UUID | None:
+    """
+    Lease the oldest purge that no worker is running, returns its user id.
+    """
+    now = get_datetime_utc()
+    due = (
+        select(UserPurge.user_id)
+        .where(col(UserPurge.next_attempt_at) <= now)
+        .order_by(col(UserPurge.created_at))
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    statement = (
+        update(UserPurge)
+        .where(col(UserPurge.user_id).in_(due.scalar_subquery()))
+        .values(next_attempt_at=now + get_lease_duration())
+        .returning(col(UserPurge.user_id))
+    )
+    with Session(engine) as session:
+        user_id = session.scalars(statement).first()
+        session.commit()
+    return user_id
+
+
+def purge_chunk(user_id: uuid.UUID) -> int:
+    """
+    Delete up to USER_PURGE_CHUNK_SIZE items of the user in one transaction and
+    renew the lease, returns how many were deleted.
+    """
+    chunk = (
+        select(Item.id)
+        .where(col(Item.owner_id) == user_id)
+        .limit(settings.USER_PURGE_CHUNK_SIZE)
+        .with_for_update(skip_locked=True)
+    )
+    renew = (
+        update(UserPurge)
+        .where(col(UserPurge.user_id) == user_id)
+        .values(next_attempt_at=get_datetime_utc() + get_lease_duration())
+    )
+    with Session(engine) as session:
+        result = session.exec(
+            delete(Item).where(col(Item.id).in_(chunk.scalar_subquery()))
+        )  # type: ignore
+        session.exec(renew)  # type: ignore
+        session.commit()
+    deleted: int = result.rowcount
+    return deleted
+
+
+def purge_user(user_id: uuid.UUID, stopping: threading.Event | None = None) -> bool:
+    """
+    Delete the items of the user chunk by chunk, then the user and its queue
+    entry. Returns False when interrupted by `stopping`, the purge is resumed
+    once its lease is over.
+    """
+    while purge_chunk(user_id) == settings.USER_PURGE_CHUNK_SIZE:
+        if stopping is not None and stopping.is_set():
+            return False
+    # Items created or skipped meanwhile go with the user
+    with Session(engine) as session:
+        session.exec(delete(User).where(col(User.id) == user_id))  # type: ignore
+        session.commit()
+    return True
+
+
+class PurgeWorker:
+    """
+    Background thread that runs the queued purges, including those left over
+    by stopped workers.
+    """
+
+    def __init__(self) -> None:
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run_once(self) -> bool:
+        """
+        Run one purge, returns whether one was due.
+        """
+        user_id = claim_purge()
+        if user_id is None:
+            return False
+        if purge_user(user_id, self._stopping):
+            logger.info(f"Purged user {user_id}")
+        return True
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                purged = self.run_once()
+            except Exception:
+                logger.exception("Purge worker failed to purge a user")
+                purged = False
+            if not purged:
+                self._wakeup.wait(settings.USER_PURGE_POLL_INTERVAL_SECONDS)
+                self._wakeup.clear()
+
+    def wakeup(self) -> None:
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="purge-worker", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+
+
+purge_worker: PurgeWorker | None = None
+
+
+def start_purge_worker() -> None:
+    global purge_worker
+    if purge_worker is None:
+        purge_worker = PurgeWorker()
+        purge_worker.start()
+
+
+def stop_purge_worker() -> None:
+    global purge_worker
+    if purge_worker is not None:
+        purge_worker.stop()
+        purge_worker = None
@@ -1,10 +1,28 @@
 import uuid
+from collections import Counter
 from typing import Any
 
-from sqlmodel import Session, select
+from sqlalchemy import Boolean, Uuid, case, column, insert, values
+from sqlmodel import AutoString, Session, col, delete, select, update
 
-from app.core.security import get_password_hash, verify_password
-from app.models import Item, ItemCreate, User, UserCreate, UserUpdate
+from app.core.cache import invalidate_user
+from app.core.response_cache import invalidate_owner
+from app.core.security import (
+    get_password_hash,
+    password_needs_update,
+    verify_password,
+)
+from app.models import (
+    Item,
+    ItemBulkResult,
+    ItemBulkUpdate,
+    ItemCreate,
+    ItemPublic,
+    User,
+    UserCreate,
+    UserPublic,
+    UserUpdate,
+)
 
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
@@ -13,7 +31,6 @@ def create_user(*, session: Session, user_create: UserCreate) -> User:
     )
     session.add(db_obj)
     session.commit()
-    session.refresh(db_obj)
     return db_obj
 
 
@@ -27,7 +44,7 @@ def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
     db_user.sqlmodel_update(user_data, update=extra_data)
     session.add(db_user)
     session.commit()
-    session.refresh(db_user)
+    invalidate_user(db_user.id)
     return db_user
 
 
@@ -43,12 +60,177 @@ def authenticate(*, session: Session, email: str, password: str) -> User | None:
         return None
     if not verify_password(password, db_user.hashed_password):
         return None
+    if password_needs_update(db_user.hashed_password):
+        db_user.hashed_password = get_password_hash(password)
+        session.add(db_user)
+        session.commit()
+        invalidate_user(db_user.id)
     return db_user
 
 
+def adjust_item_count(*, session: Session, owner_id: uuid.UUID, delta: int) -> None:
+    statement = (
+        update(User)
+        .where(col(User.id) == owner_id)
+        # The counter isn't part of the public user, keep its version
+        .values(
+            item_count=col(User.item_count) + delta,
+            version=col(User.version),
+            updated_at=col(User.updated_at),
+        )
+    )
+    session.exec(statement)  # type: ignore
+
+
+def get_item_count(*, session: Session, owner_id: uuid.UUID) -> int:
+    statement = select(User.item_count).where(User.id == owner_id)
+    return session.exec(statement).one()
+
+
 def create_item(*, session: Session, item_in: ItemCreate, owner_id: uuid.UUID) -> Item:
     db_item = Item.model_validate(item_in, update={"owner_id": owner_id})
     session.add(db_item)
+    adjust_item_count(session=session, owner_id=owner_id, delta=1)
     session.commit()
-    session.refresh(db_item)
+    invalidate_owner(owner_id)
     return db_item
+
+
+def check_bulk_access(
+    *,
+    session: Session,
+    ids: list[uuid.UUID],
+    current_user: UserPublic,
+) -> dict[uuid.UUID, str]:
+    """
+    Apply the ownership checks of the single item routes to a batch of ids,
+    in one query. Returns the error of every id that can't be modified.
+
+    The rows are locked until the end of the transaction, so that they can't
+    be deleted between the check and the write.
+    """
+    statement = (
+        select(Item.id, Item.owner_id)
+        .where(col(Item.id).in_(ids))
+        # In a consistent order, so that concurrent batches don't deadlock
+        .order_by(col(Item.id))
+        .with_for_update()
+    )
+    owners = dict(session.exec(statement).all())
+    errors: dict[uuid.UUID, str] = {}
+    seen: set[uuid.UUID] = set()
+    for id in ids:
+        if id in seen:
+            errors[id] = "Duplicate item id"
+        elif id not in owners:
+            errors[id] = "Item not found"
+        elif not current_user.is_superuser and owners[id] != current_user.id:
+            errors[id] = "Not enough permissions"
+        seen.add(id)
+    return errors
+
+
+def create_items(
+    *, session: Session, items_in: list[ItemCreate], owner_id: uuid.UUID
+) -> list[ItemBulkResult]:
+    rows = [
+        Item.model_validate(item_in, update={"owner_id": owner_id}).model_dump()
+        for item_in in items_in
+    ]
+    # A single multi-row INSERT ... RETURNING
+    statement = insert(Item).returning(Item, sort_by_parameter_order=True)
+    items = session.scalars(statement, rows).all()
+    results = [
+        ItemBulkResult(id=item.id, item=ItemPublic.model_validate(item))
+        for item in items
+    ]
+    adjust_item_count(session=session, owner_id=owner_id, delta=len(items))
+    session.commit()
+    invalidate_owner(owner_id)
+    return results
+
+
+def update_items(
+    *, session: Session, items_in: list[ItemBulkUpdate], current_user: UserPublic
+) -> list[ItemBulkResult]:
+    errors = check_bulk_access(
+        session=session,
+        ids=[item_in.id for item_in in items_in],
+        current_user=current_user,
+    )
+    rows = []
+    for item_in in items_in:
+        if item_in.id in errors:
+            continue
+        update_dict = item_in.model_dump(exclude_unset=True)
+        rows.append(
+            (
+                item_in.id,
+                update_dict.get("title"),
+                update_dict.get("title") is not None,
+                update_dict.get("description"),
+                "description" in update_dict,
+            )
+        )
+    updated: dict[uuid.UUID, Item] = {}
+    if rows:
+        # UPDATE item SET ... FROM (VALUES ...) so every row changes in one statement
+        item_update = values(
+            column("id", Uuid),
+            column("title", AutoString),
+            column("set_title", Boolean),
+            column("description", AutoString),
+            column("set_description", Boolean),
+            name="item_update",
+        ).data(rows)
+        statement = (
+            update(Item)
+            .where(col(Item.id) == item_update.c.id)
+            .values(
+                title=case(
+                    (item_update.c.set_title, item_update.c.title),
+                    else_=col(Item.title),
+                ),
+                description=case(
+                    (item_update.c.set_description, item_update.c.description),
+                    else_=col(Item.description),
+                ),
+            )
+            .returning(Item)
+            .execution_options(synchronize_session=False)
+        )
+        updated = {item.id: item for item in session.scalars(statement)}
+    results = [
+        ItemBulkResult(id=item_in.id, error=errors[item_in.id])
+        if item_in.id in errors
+        else ItemBulkResult(
+            id=item_in.id, item=ItemPublic.model_validate(updated[item_in.id])
+        )
+        for item_in in items_in
+    ]
+    session.commit()
+    for owner_id in {item.owner_id for item in updated.values()}:
+        invalidate_owner(owner_id)
+    return results
+
+
+def delete_items(
+    *, session: Session, ids: list[uuid.UUID], current_user: UserPublic
+) -> list[ItemBulkResult]:
+    errors = check_bulk_access(session=session, ids=ids, current_user=current_user)
+    allowed = [id for id in ids if id not in errors]
+    deleted_per_owner: Counter[uuid.UUID] = Counter()
+    if allowed:
+        statement = (
+            delete(Item)
+            .where(col(Item.id).in_(allowed))
+            .returning(col(Item.owner_id))
+            .execution_options(synchronize_session=False)
+        )
+        deleted_per_owner.update(session.scalars(statement))
+        for owner_id, deleted in deleted_per_owner.items():
+            adjust_item_count(session=session, owner_id=owner_id, delta=-deleted)
+    session.commit()
+    for owner_id in deleted_per_owner:
+        invalidate_owner(owner_id)
+    return [ItemBulkResult(id=id, error=errors.get(id)) for id in ids]
@@ -0,0 +1,41 @@
+import uuid
+
+from sqlmodel import col, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.response_cache import invalidate_owner
+from app.models import Item, ItemCreate, User
+
+# Async counterparts of the app.crud functions used by the async item routes.
+
+
+async def adjust_item_count(
+    *, session: AsyncSession, owner_id: uuid.UUID, delta: int
+) -> None:
+    statement = (
+        update(User)
+        .where(col(User.id) == owner_id)
+        # The counter isn't part of the public user, keep its version
+        .values(
+            item_count=col(User.item_count) + delta,
+            version=col(User.version),
+            updated_at=col(User.updated_at),
+        )
+    )
+    await session.exec(statement)  # type: ignore
+
+
+async def get_item_count(*, session: AsyncSession, owner_id: uuid.UUID) -> int:
+    statement = select(User.item_count).where(User.id == owner_id)
+    return (await session.exec(statement)).one()
+
+
+async def create_item(
+    *, session: AsyncSession, item_in: ItemCreate, owner_id: uuid.UUID
+) -> Item:
+    db_item = Item.model_validate(item_in, update={"owner_id": owner_id})
+    session.add(db_item)
+    await adjust_item_count(session=session, owner_id=owner_id, delta=1)
+    await session.commit()
+    invalidate_owner(owner_id)
+    return db_item
@@ -1,10 +1,20 @@
-import sentry_sdk
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, mark_process_dead, metrics
+from app.core.outbox import start_email_worker, stop_email_worker
+from app.core.read_routing import ReadRoutingMiddleware
+from app.core.server_timing import QueryStatsMiddleware
+from app.core.user_purge import start_purge_worker, stop_purge_worker
+from app.utils import load_email_templates
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -12,14 +22,56 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 
 
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
+    # Imported only when used, it takes a noticeable part of the startup
+    import sentry_sdk
+
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    if settings.emails_enabled:
+        load_email_templates()
+        start_email_worker()
+    start_purge_worker()
+    yield
+    stop_purge_worker()
+    stop_email_worker()
+    mark_process_dead()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+if settings.COMPRESSION != "off":
+    app.add_middleware(
+        CompressionMiddleware,
+        compression=settings.COMPRESSION,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.GZIP_LEVEL,
+        brotli_quality=settings.BROTLI_QUALITY,
+    )
+
+if settings.DB_QUERY_STATS:
+    app.add_middleware(
+        QueryStatsMiddleware,
+        repeated_threshold=settings.DB_REPEATED_QUERY_THRESHOLD,
+    )
+
+if settings.POSTGRES_REPLICAS:
+    app.add_middleware(
+        ReadRoutingMiddleware, max_age=settings.DB_READ_YOUR_WRITES_SECONDS
+    )
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.add_api_route("/metrics", metrics, include_in_schema=False, tags=["metrics"])
+
 # Set all CORS enabled origins
 if settings.all_cors_origins:
     app.add_middleware(
@@ -1,8 +1,22 @@
 import uuid
+from datetime import datetime, timezone
+from typing import Any, Literal
 
 from pydantic import EmailStr
+from sqlalchemy import Column, Computed, DateTime, Index, Text, text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlmodel import Field, Relationship, SQLModel
 
+from app.core.ids import new_id
+
+
+def get_datetime_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# How list endpoints compute their total count
+CountMode = Literal["exact", "estimated", "none"]
+
 
 # Shared properties
 class UserBase(SQLModel):
@@ -41,19 +55,52 @@ class UpdatePassword(SQLModel):
 
 # Database model, database table inferred from class name
 class User(UserBase, table=True):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    __table_args__ = (
+        Index("ix_user_created_at_id", "created_at", "id"),
+        Index("ix_user_updated_at_id", "updated_at", "id"),
+    )
+    # Fetch server generated values with RETURNING in the INSERT/UPDATE itself
+    __mapper_args__ = {"eager_defaults": True}
+
+    id: uuid.UUID = Field(default_factory=new_id, primary_key=True)
     hashed_password: str
-    items: list["Item"] = Relationship(back_populates="owner", cascade_delete=True)
+    created_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_type=DateTime(timezone=True),  # type: ignore
+        sa_column_kwargs={"server_default": text("now()")},
+    )
+    # Maintained by the item write paths so owners can be counted in O(1)
+    item_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # Bumped by every UPDATE, it's the ETag of the resource
+    version: int = Field(
+        default=1,
+        sa_column_kwargs={"server_default": "1", "onupdate": text("version + 1")},
+    )
+    updated_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_type=DateTime(timezone=True),  # type: ignore
+        sa_column_kwargs={
+            "server_default": text("now()"),
+            "onupdate": get_datetime_utc,
+        },
+    )
+    # Deleted by the database (ON DELETE CASCADE) without loading them first
+    items: list["Item"] = Relationship(
+        back_populates="owner", cascade_delete=True, passive_deletes=True
+    )
 
 
 # Properties to return via API, id is always required
 class UserPublic(UserBase):
     id: uuid.UUID
+    version: int
+    updated_at: datetime
 
 
 class UsersPublic(SQLModel):
     data: list[UserPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
 
 
 # Shared properties
@@ -74,22 +121,104 @@ class ItemUpdate(ItemBase):
 
 # Database model, database table inferred from class name
 class Item(ItemBase, table=True):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    __table_args__ = (
+        Index("ix_item_created_at_id", "created_at", "id"),
+        Index("ix_item_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_item_updated_at_id", "updated_at", "id"),
+        Index("ix_item_owner_id_updated_at_id", "owner_id", "updated_at", "id"),
+        # Substring and prefix matches on the title, needs pg_trgm
+        Index(
+            "ix_item_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+    )
+    __mapper_args__ = {"eager_defaults": True}
+
+    id: uuid.UUID = Field(default_factory=new_id, primary_key=True)
     owner_id: uuid.UUID = Field(
         foreign_key="user.id", nullable=False, ondelete="CASCADE"
     )
+    created_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_type=DateTime(timezone=True),  # type: ignore
+        sa_column_kwargs={"server_default": text("now()")},
+    )
+    version: int = Field(
+        default=1,
+        sa_column_kwargs={"server_default": "1", "onupdate": text("version + 1")},
+    )
+    updated_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_type=DateTime(timezone=True),  # type: ignore
+        sa_column_kwargs={
+            "server_default": text("now()"),
+            "onupdate": get_datetime_utc,
+        },
+    )
     owner: User | None = Relationship(back_populates="items")
 
 
+# Full-text search document of the items, generated by the database. It's a
+# column of the table but not of the model, so the ORM never loads or writes it.
+ITEM_SEARCH_CONFIG = "simple"
+item_search_vector = Column(
+    "search_vector",
+    TSVECTOR,
+    Computed(
+        f"setweight(to_tsvector('{ITEM_SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+        f"setweight(to_tsvector('{ITEM_SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+        persisted=True,
+    ),
+)
+Item.__table__.append_column(item_search_vector)  # type: ignore[attr-defined]
+Index("ix_item_search_vector", item_search_vector, postgresql_using="gin")
+
+
 # Properties to return via API, id is always required
 class ItemPublic(ItemBase):
     id: uuid.UUID
     owner_id: uuid.UUID
+    version: int
+    updated_at: datetime
 
 
 class ItemsPublic(SQLModel):
     data: list[ItemPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
+
+
+# Largest number of items accepted by the bulk endpoints
+BULK_MAX_ITEMS = 1000
+
+
+class ItemsBulkCreate(SQLModel):
+    data: list[ItemCreate] = Field(min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class ItemBulkUpdate(ItemUpdate):
+    id: uuid.UUID
+
+
+class ItemsBulkUpdate(SQLModel):
+    data: list[ItemBulkUpdate] = Field(min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class ItemsBulkDelete(SQLModel):
+    ids: list[uuid.UUID] = Field(min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+# Outcome of one entry of a bulk request, in request order
+class ItemBulkResult(SQLModel):
+    id: uuid.UUID | None = None
+    item: ItemPublic | None = None
+    error: str | None = None
+
+
+class ItemsBulkResult(SQLModel):
+    data: list[ItemBulkResult]
 
 
 # Generic message
@@ -97,6 +226,24 @@ class Message(SQLModel):
     message: str
 
 
+# Connection pool snapshot of a single worker process
+class PoolStatus(SQLModel):
+    name: str
+    pool_class: str
+    size: int = 0
+    checked_in: int = 0
+    checked_out: int = 0
+    overflow: int = 0
+    checkouts: int = 0
+    wait_ms_total: float = 0.0
+    wait_ms_max: float = 0.0
+
+
+class PoolsStatus(SQLModel):
+    pid: int
+    pools: list[PoolStatus]
+
+
 # JSON payload containing access token
 class Token(SQLModel):
     access_token: str
@@ -111,3 +258,43 @@ class TokenPayload(SQLModel):
 class NewPassword(SQLModel):
     token: str
     new_password: str = Field(min_length=8, max_length=40)
+
+
+# Emails waiting to be sent, see app.core.outbox. They are rendered when sent,
+# the context holds no secrets, see app.utils.render_email
+class EmailOutbox(SQLModel, table=True):
+    id: uuid.UUID = Field(default_factory=new_id, primary_key=True)
+    email_to: str = Field(max_length=255)
+    subject: str = Field(max_length=255)
+    template_name: str = Field(max_length=255)
+    context: dict[str, Any] = Field(default_factory=dict, sa_type=JSONB)
+    attempts: int = 0
+    next_attempt_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_type=DateTime(timezone=True),  # type: ignore
+        index=True,
+    )
+    last_error: str | None = Field(default=None, sa_type=Text)
+    created_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_type=DateTime(timezone=True),  # type: ignore
+        sa_column_kwargs={"server_default": text("now()")},
+    )
+
+
+# Users whose items are deleted in chunks before the user, see
+# app.core.user_purge. The row is deleted along with the user
+class UserPurge(SQLModel, table=True):
+    user_id: uuid.UUID = Field(
+        foreign_key="user.id", primary_key=True, ondelete="CASCADE"
+    )
+    # Lease of the worker running the purge, past it another worker resumes it
+    next_attempt_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_type=DateTime(timezone=True),  # type: ignore
+    )
+    created_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_type=DateTime(timezone=True),  # type: ignore
+        sa_column_kwargs={"server_default": text("now()")},
+    )
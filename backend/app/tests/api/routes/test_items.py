@@ -1,10 +1,18 @@
+import csv
+import io
+import json
 import uuid
 
+import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 
 from app.core.config import settings
+from app.core.metrics import registry
+from app.models import BULK_MAX_ITEMS, ItemPublic
 from app.tests.utils.item import create_random_item
+from app.tests.utils.sql import assert_num_queries
+from app.tests.utils.utils import random_lower_string
 
 
 def test_create_item(
@@ -162,3 +170,483 @@ def test_delete_item_not_enough_permissions(
     assert response.status_code == 400
     content = response.json()
     assert content["detail"] == "Not enough permissions"
+
+
+def test_read_items_with_cursor(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    for i in range(3):
+        client.post(
+            f"{settings.API_V1_STR}/items/",
+            headers=normal_user_token_headers,
+            json={"title": f"Cursor {i}"},
+        )
+    seen: list[str] = []
+    after = None
+    while True:
+        params: dict[str, str | int] = {"limit": 2}
+        if after:
+            params["after"] = after
+        response = client.get(
+            f"{settings.API_V1_STR}/items/",
+            headers=normal_user_token_headers,
+            params=params,
+        )
+        assert response.status_code == 200
+        content = response.json()
+        assert len(content["data"]) <= 2
+        seen.extend(item["id"] for item in content["data"])
+        after = content["next_cursor"]
+        if not after:
+            break
+    assert len(seen) == len(set(seen))
+    assert len(seen) == content["count"]
+
+
+def test_read_items_invalid_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"after": "not-a-cursor"},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_read_items_count_modes(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    create_random_item(db)
+    for count, expected_type in (("exact", int), ("estimated", int)):
+        response = client.get(
+            f"{settings.API_V1_STR}/items/",
+            headers=superuser_token_headers,
+            params={"count": count},
+        )
+        assert response.status_code == 200
+        assert isinstance(response.json()["count"], expected_type)
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"count": "none"},
+    )
+    assert response.json()["count"] is None
+
+
+def test_read_items_estimated_count_with_filter(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    items = [create_random_item(db) for _ in range(2)]
+    owner_ids = ",".join(str(item.owner_id) for item in items)
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"count": "estimated", "filter": f"owner_id:in:{owner_ids}"},
+    )
+    assert response.status_code == 200
+    assert isinstance(response.json()["count"], int)
+
+
+def test_read_items_owner_count_tracks_writes(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    url = f"{settings.API_V1_STR}/items/"
+    before = client.get(url, headers=normal_user_token_headers).json()["count"]
+    response = client.post(
+        url, headers=normal_user_token_headers, json={"title": "Counted"}
+    )
+    item_id = response.json()["id"]
+    assert client.get(url, headers=normal_user_token_headers).json()["count"] == (
+        before + 1
+    )
+    client.delete(f"{url}{item_id}", headers=normal_user_token_headers)
+    assert client.get(url, headers=normal_user_token_headers).json()["count"] == before
+
+
+def test_bulk_create_items(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    data = {"data": [{"title": f"Bulk {i}", "description": "Item"} for i in range(3)]}
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=data,
+    )
+    assert response.status_code == 200
+    results = response.json()["data"]
+    assert [r["item"]["title"] for r in results] == ["Bulk 0", "Bulk 1", "Bulk 2"]
+    assert all(r["error"] is None and r["id"] == r["item"]["id"] for r in results)
+
+
+def test_bulk_create_items_too_many(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    data = {"data": [{"title": "Bulk"}] * (BULK_MAX_ITEMS + 1)}
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=data,
+    )
+    assert response.status_code == 422
+
+
+def test_bulk_update_items(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json={"data": [{"title": "Own", "description": "Kept"}, {"title": "Own"}]},
+    )
+    own_ids = [r["id"] for r in response.json()["data"]]
+    other_item = create_random_item(db)
+    missing_id = str(uuid.uuid4())
+    data = {
+        "data": [
+            {"id": own_ids[0], "title": "Renamed"},
+            {"id": own_ids[1], "description": "Described"},
+            {"id": str(other_item.id), "title": "Stolen"},
+            {"id": missing_id, "title": "Missing"},
+        ]
+    }
+    response = client.patch(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=data,
+    )
+    assert response.status_code == 200
+    results = response.json()["data"]
+    assert results[0]["item"]["title"] == "Renamed"
+    assert results[0]["item"]["description"] == "Kept"
+    assert results[1]["item"]["title"] == "Own"
+    assert results[1]["item"]["description"] == "Described"
+    assert results[2] == {
+        "id": str(other_item.id),
+        "item": None,
+        "error": "Not enough permissions",
+    }
+    assert results[3] == {"id": missing_id, "item": None, "error": "Item not found"}
+    db.refresh(other_item)
+    assert other_item.title != "Stolen"
+
+
+def test_bulk_delete_items(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    url = f"{settings.API_V1_STR}/items/"
+    count_before = client.get(url, headers=normal_user_token_headers).json()["count"]
+    response = client.post(
+        f"{url}bulk",
+        headers=normal_user_token_headers,
+        json={"data": [{"title": "Doomed"}, {"title": "Doomed"}]},
+    )
+    own_ids = [r["id"] for r in response.json()["data"]]
+    other_item = create_random_item(db)
+    response = client.request(
+        "DELETE",
+        f"{url}bulk",
+        headers=normal_user_token_headers,
+        json={"ids": [*own_ids, str(other_item.id)]},
+    )
+    assert response.status_code == 200
+    results = response.json()["data"]
+    assert [r["error"] for r in results] == [None, None, "Not enough permissions"]
+    for id in own_ids:
+        response = client.get(f"{url}{id}", headers=normal_user_token_headers)
+        assert response.status_code == 404
+    count_after = client.get(url, headers=normal_user_token_headers).json()["count"]
+    assert count_after == count_before
+
+
+def test_export_items_ndjson(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    url = f"{settings.API_V1_STR}/items/"
+    client.post(url, headers=normal_user_token_headers, json={"title": "Exported"})
+    count = client.get(url, headers=normal_user_token_headers).json()["count"]
+    response = client.get(f"{url}export", headers=normal_user_token_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == count
+    assert "Exported" in [line["title"] for line in lines]
+    assert len({line["owner_id"] for line in lines}) == 1
+
+
+def test_export_items_csv(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    item = create_random_item(db)
+    response = client.get(
+        f"{settings.API_V1_STR}/items/export",
+        headers=superuser_token_headers,
+        params={"format": "csv"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert set(ItemPublic.model_fields) == set(rows[0])
+    assert str(item.id) in [row["id"] for row in rows]
+
+
+def test_item_writes_are_single_statements(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    url = f"{settings.API_V1_STR}/items/"
+    # Warm the user cache so only the write itself is counted
+    client.get(f"{settings.API_V1_STR}/users/me", headers=superuser_token_headers)
+    # INSERT item, UPDATE the owner's counter
+    with assert_num_queries(2):
+        response = client.post(
+            url, headers=superuser_token_headers, json={"title": "A"}
+        )
+    assert response.status_code == 200
+    # SELECT item, UPDATE item
+    with assert_num_queries(2):
+        response = client.put(
+            f"{url}{response.json()['id']}",
+            headers=superuser_token_headers,
+            json={"title": "B"},
+        )
+    assert response.status_code == 200
+    assert response.json()["title"] == "B"
+
+
+def test_read_item_not_modified(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    item = create_random_item(db)
+    url = f"{settings.API_V1_STR}/items/{item.id}"
+    response = client.get(url, headers=superuser_token_headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag == f'"{item.version}"'
+    response = client.get(
+        url, headers={**superuser_token_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    last_modified = response.headers["last-modified"]
+    response = client.get(
+        url, headers={**superuser_token_headers, "If-Modified-Since": last_modified}
+    )
+    assert response.status_code == 304
+    response = client.get(
+        url, headers={**superuser_token_headers, "If-None-Match": '"0"'}
+    )
+    assert response.status_code == 200
+
+
+def test_update_item_if_match(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    item = create_random_item(db)
+    url = f"{settings.API_V1_STR}/items/{item.id}"
+    etag = client.get(url, headers=superuser_token_headers).headers["etag"]
+    response = client.put(
+        url,
+        headers={**superuser_token_headers, "If-Match": etag},
+        json={"title": "First"},
+    )
+    assert response.status_code == 200
+    assert response.json()["version"] == item.version + 1
+    new_etag = response.headers["etag"]
+    assert new_etag != etag
+    # A second writer still holding the old ETag
+    response = client.put(
+        url,
+        headers={**superuser_token_headers, "If-Match": etag},
+        json={"title": "Second"},
+    )
+    assert response.status_code == 412
+    response = client.get(url, headers=superuser_token_headers)
+    assert response.json()["title"] == "First"
+    assert response.headers["etag"] == new_etag
+
+
+def test_search_items(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    superuser_token_headers: dict[str, str],
+) -> None:
+    url = f"{settings.API_V1_STR}/items/"
+    word = random_lower_string()[:12]
+    for headers, item in (
+        (normal_user_token_headers, {"title": f"{word} in title"}),
+        (normal_user_token_headers, {"title": "Other", "description": f"a {word}"}),
+        (normal_user_token_headers, {"title": f"pre{word}post"}),
+        (superuser_token_headers, {"title": f"{word} of the superuser"}),
+    ):
+        client.post(url, headers=headers, json=item)
+
+    r = client.get(url, headers=normal_user_token_headers, params={"q": word})
+    assert r.status_code == 200
+    content = r.json()
+    titles = [item["title"] for item in content["data"]]
+    # Whole word in the title ranks above the description, the substring match
+    # only comes from the trigram index, the superuser's item is out of scope
+    assert titles[0] == f"{word} in title"
+    assert set(titles) == {f"{word} in title", "Other", f"pre{word}post"}
+    assert content["count"] == 3
+
+    r = client.get(url, headers=superuser_token_headers, params={"q": word[2:8]})
+    assert len(r.json()["data"]) == 3
+
+    r = client.get(
+        url,
+        headers=normal_user_token_headers,
+        params={"q": word, "limit": 1, "skip": 1},
+    )
+    assert [item["title"] for item in r.json()["data"]] == titles[1:2]
+
+    r = client.get(url, headers=normal_user_token_headers, params={"q": "%"})
+    assert r.json()["data"] == []
+
+
+def test_search_items_with_cursor(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=normal_user_token_headers,
+        params={"q": "foo", "after": "cursor"},
+    )
+    assert r.status_code == 400
+
+
+def test_read_items_filter_and_sort(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    item = create_random_item(db)
+    url = f"{settings.API_V1_STR}/items/"
+    r = client.get(
+        url,
+        headers=superuser_token_headers,
+        params={"filter": f"owner_id:eq:{item.owner_id}"},
+    )
+    assert r.status_code == 200
+    assert [i["id"] for i in r.json()["data"]] == [str(item.id)]
+    assert r.json()["count"] == 1
+
+    client.put(f"{url}{item.id}", headers=superuser_token_headers, json={"title": "X"})
+    r = client.get(url, headers=superuser_token_headers, params={"sort": "-updated_at"})
+    data = r.json()["data"]
+    assert data[0]["id"] == str(item.id)
+    updated_at = [i["updated_at"] for i in data]
+    assert updated_at == sorted(updated_at, reverse=True)
+
+    r = client.get(url, headers=superuser_token_headers, params={"sort": "title"})
+    assert r.status_code == 400
+
+
+def cache_lookups(route: str, result: str) -> float:
+    value = registry.get_sample_value(
+        "response_cache_lookups_total", {"route": route, "result": result}
+    )
+    return value or 0.0
+
+
+@pytest.fixture
+def response_cache_ttl(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Off by default with the memory backend the tests use
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_TTL_SECONDS", 30)
+
+
+@pytest.mark.usefixtures("response_cache_ttl")
+def test_read_items_cached_until_owner_writes(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    url = f"{settings.API_V1_STR}/items/?limit=5&count=exact"
+    # With read replicas, reads right after a write bypass the cache
+    client.cookies.clear()
+    first = client.get(url, headers=normal_user_token_headers)
+    hits = cache_lookups("read_items", "hit")
+    # Same query in another order
+    second = client.get(
+        f"{settings.API_V1_STR}/items/?count=exact&limit=5",
+        headers=normal_user_token_headers,
+    )
+    assert cache_lookups("read_items", "hit") == hits + 1
+    assert second.json() == first.json()
+
+    client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=normal_user_token_headers,
+        json={"title": "Cached"},
+    )
+    third = client.get(url, headers=normal_user_token_headers)
+    assert cache_lookups("read_items", "hit") == hits + 1
+    assert third.json()["count"] == first.json()["count"] + 1
+
+
+@pytest.mark.usefixtures("response_cache_ttl")
+def test_read_item_cached_until_updated(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=normal_user_token_headers,
+        json={"title": "Before"},
+    )
+    url = f"{settings.API_V1_STR}/items/{r.json()['id']}"
+    # With read replicas, reads right after a write bypass the cache
+    client.cookies.clear()
+    etag = client.get(url, headers=normal_user_token_headers).headers["etag"]
+    hits = cache_lookups("read_item", "hit")
+    r = client.get(url, headers={**normal_user_token_headers, "If-None-Match": etag})
+    assert r.status_code == 304
+    assert cache_lookups("read_item", "hit") == hits + 1
+
+    client.put(url, headers=normal_user_token_headers, json={"title": "After"})
+    r = client.get(url, headers=normal_user_token_headers)
+    assert r.json()["title"] == "After"
+    assert r.headers["etag"] != etag
+
+
+@pytest.mark.usefixtures("response_cache_ttl")
+def test_read_item_invalidated_by_superuser_bulk_delete(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    superuser_token_headers: dict[str, str],
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=normal_user_token_headers,
+        json={"title": "Doomed"},
+    )
+    url = f"{settings.API_V1_STR}/items/{r.json()['id']}"
+    assert client.get(url, headers=normal_user_token_headers).status_code == 200
+    client.request(
+        "DELETE",
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=superuser_token_headers,
+        json={"ids": [r.json()["id"]]},
+    )
+    assert client.get(url, headers=normal_user_token_headers).status_code == 404
+
+
+@pytest.mark.usefixtures("response_cache_ttl")
+def test_superuser_reads_not_cached(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    lookups = cache_lookups("read_items", "hit") + cache_lookups("read_items", "miss")
+    client.get(f"{settings.API_V1_STR}/items/", headers=superuser_token_headers)
+    client.get(f"{settings.API_V1_STR}/items/", headers=superuser_token_headers)
+    after = cache_lookups("read_items", "hit") + cache_lookups("read_items", "miss")
+    assert after == lookups
+
+
+@pytest.mark.usefixtures("response_cache_ttl")
+def test_response_cache_disabled_route(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_DISABLED_ROUTES", ["read_items"])
+    hits = cache_lookups("read_items", "hit")
+    client.get(f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers)
+    client.get(f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers)
+    assert cache_lookups("read_items", "hit") == hits
@@ -0,0 +1,92 @@
+import uuid
+from collections.abc import Generator
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import items_async
+from app.core.config import settings
+from app.core.db import async_engine
+
+
+@pytest.fixture(scope="module")
+def async_client() -> Generator[TestClient, None, None]:
+    app = FastAPI()
+    app.include_router(items_async.router, prefix=settings.API_V1_STR)
+    with TestClient(app) as c:
+        yield c
+        # Pooled connections belong to this client's event loop
+        assert c.portal
+        c.portal.call(async_engine.dispose)
+
+
+def test_async_item_crud(
+    async_client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    url = f"{settings.API_V1_STR}/items/"
+    response = async_client.post(
+        url,
+        headers=normal_user_token_headers,
+        json={"title": "Async", "description": "Item"},
+    )
+    assert response.status_code == 200
+    item = response.json()
+    assert item["title"] == "Async"
+
+    response = async_client.get(f"{url}{item['id']}", headers=normal_user_token_headers)
+    assert response.status_code == 200
+    assert response.json() == item
+
+    response = async_client.get(url, headers=normal_user_token_headers)
+    assert response.status_code == 200
+    assert item["id"] in [i["id"] for i in response.json()["data"]]
+
+    response = async_client.put(
+        f"{url}{item['id']}",
+        headers=normal_user_token_headers,
+        json={"title": "Updated"},
+    )
+    assert response.status_code == 200
+    assert response.json()["title"] == "Updated"
+
+    response = async_client.delete(
+        f"{url}{item['id']}", headers=normal_user_token_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["message"] == "Item deleted successfully"
+
+
+def test_async_read_items_superuser(
+    async_client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = async_client.get(
+        f"{settings.API_V1_STR}/items/", headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    assert isinstance(response.json()["count"], int)
+
+
+def test_async_read_item_not_found(
+    async_client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = async_client.get(
+        f"{settings.API_V1_STR}/items/{uuid.uuid4()}",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Item not found"
+
+
+def test_async_search_items(
+    async_client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    url = f"{settings.API_V1_STR}/items/"
+    title = f"async-{uuid.uuid4().hex}"
+    async_client.post(url, headers=normal_user_token_headers, json={"title": title})
+    response = async_client.get(
+        url, headers=normal_user_token_headers, params={"q": title[6:18]}
+    )
+    assert response.status_code == 200
+    assert [item["title"] for item in response.json()["data"]] == [title]
+    assert response.json()["count"] == 1
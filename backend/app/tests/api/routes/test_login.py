@@ -1,12 +1,13 @@
 from unittest.mock import patch
 
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlmodel import Session, select
 
 from app.core.config import settings
 from app.core.security import verify_password
 from app.crud import create_user
-from app.models import UserCreate
+from app.models import EmailOutbox, UserCreate
+from app.tests.utils.smtp import FakeSMTPServer
 from app.tests.utils.user import user_authentication_headers
 from app.tests.utils.utils import random_email, random_lower_string
 from app.utils import generate_password_reset_token
@@ -33,6 +34,48 @@ def test_get_access_token_incorrect_password(client: TestClient) -> None:
     assert r.status_code == 400
 
 
+def test_get_access_token_hashing_busy(client: TestClient) -> None:
+    login_data = {
+        "username": settings.FIRST_SUPERUSER,
+        "password": settings.FIRST_SUPERUSER_PASSWORD,
+    }
+    with (
+        patch("app.core.config.settings.HASH_WORKERS", 1),
+        patch("app.core.security.hashing_service.max_pending", 0),
+    ):
+        r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+
+
+def test_get_access_token_rate_limited(client: TestClient) -> None:
+    login_data = {"username": random_email(), "password": "incorrect"}
+    with patch("app.crud.verify_password", return_value=False) as verify:
+        for _ in range(settings.RATE_LIMIT_PER_EMAIL):
+            r = client.post(
+                f"{settings.API_V1_STR}/login/access-token", data=login_data
+            )
+            assert r.status_code == 400
+        r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    assert r.status_code == 429
+    assert 0 < int(r.headers["Retry-After"]) <= settings.RATE_LIMIT_WINDOW_SECONDS
+    # Unknown emails aren't verified either, only the limit applies
+    assert verify.call_count == 0
+    # Other emails from the same client are still let through
+    login_data["username"] = settings.FIRST_SUPERUSER
+    login_data["password"] = settings.FIRST_SUPERUSER_PASSWORD
+    r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    assert r.status_code == 200
+
+
+def test_rate_limited_login_skips_hashing(client: TestClient) -> None:
+    login_data = {"username": settings.FIRST_SUPERUSER, "password": "incorrect"}
+    with patch("app.crud.verify_password", return_value=False) as verify:
+        for _ in range(settings.RATE_LIMIT_PER_EMAIL + 2):
+            client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    assert verify.call_count == settings.RATE_LIMIT_PER_EMAIL
+
+
 def test_use_access_token(
     client: TestClient, superuser_token_headers: dict[str, str]
 ) -> None:
@@ -61,6 +104,25 @@ def test_recovery_password(
         assert r.json() == {"message": "Password recovery email sent"}
 
 
+def test_recovery_password_is_queued(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    db: Session,
+    smtp_server: FakeSMTPServer,
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/password-recovery/{settings.EMAIL_TEST_USER}",
+        headers=normal_user_token_headers,
+    )
+    assert r.status_code == 200
+    # Queued for the email worker, the request didn't talk to the SMTP server
+    assert smtp_server.state.connections == 0
+    statement = select(EmailOutbox).where(
+        EmailOutbox.email_to == settings.EMAIL_TEST_USER
+    )
+    assert db.exec(statement).first()
+
+
 def test_recovery_password_user_not_exits(
     client: TestClient, normal_user_token_headers: dict[str, str]
 ) -> None:
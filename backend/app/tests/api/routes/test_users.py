@@ -7,7 +7,8 @@ from sqlmodel import Session, select
 from app import crud
 from app.core.config import settings
 from app.core.security import verify_password
-from app.models import User, UserCreate
+from app.models import User, UserCreate, UserPublic
+from app.tests.utils.sql import assert_num_queries
 from app.tests.utils.utils import random_email, random_lower_string
 
 
@@ -168,6 +169,118 @@ def test_retrieve_users(
         assert "email" in item
 
 
+def test_retrieve_users_with_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    for _ in range(2):
+        user_in = UserCreate(email=random_email(), password=random_lower_string())
+        crud.create_user(session=db, user_create=user_in)
+
+    r = client.get(
+        f"{settings.API_V1_STR}/users/",
+        headers=superuser_token_headers,
+        params={"limit": 1},
+    )
+    first_page = r.json()
+    assert len(first_page["data"]) == 1
+    assert first_page["next_cursor"]
+
+    r = client.get(
+        f"{settings.API_V1_STR}/users/",
+        headers=superuser_token_headers,
+        params={"limit": 1, "after": first_page["next_cursor"]},
+    )
+    second_page = r.json()
+    assert len(second_page["data"]) == 1
+    assert second_page["data"][0]["id"] != first_page["data"][0]["id"]
+
+
+def test_read_users_filter_and_sort(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    domain = f"{random_lower_string()}.com"
+    for name in ("b", "a", "c"):
+        user_in = UserCreate(email=f"{name}@{domain}", password=random_lower_string())
+        crud.create_user(session=db, user_create=user_in)
+    inactive = UserCreate(
+        email=f"d@{domain}", password=random_lower_string(), is_active=False
+    )
+    crud.create_user(session=db, user_create=inactive)
+    emails = ",".join(f"{name}@{domain}" for name in "abcd")
+    params: dict[str, str | int | list[str]] = {
+        "filter": [f"email:in:{emails}", "is_active:eq:true"],
+        "sort": "-email",
+        "limit": 2,
+    }
+    url = f"{settings.API_V1_STR}/users/"
+    r = client.get(url, headers=superuser_token_headers, params=params)
+    assert r.status_code == 200
+    page = r.json()
+    assert [user["email"] for user in page["data"]] == [f"c@{domain}", f"b@{domain}"]
+    assert page["count"] == 3
+    r = client.get(
+        url,
+        headers=superuser_token_headers,
+        params={**params, "after": page["next_cursor"]},
+    )
+    assert [user["email"] for user in r.json()["data"]] == [f"a@{domain}"]
+    # The cursor belongs to the -email order
+    r = client.get(
+        url,
+        headers=superuser_token_headers,
+        params={"sort": "email", "after": page["next_cursor"]},
+    )
+    assert r.status_code == 400
+    # The planner estimates the count of a filtered listing
+    r = client.get(
+        url,
+        headers=superuser_token_headers,
+        params={**params, "count": "estimated"},
+    )
+    assert r.status_code == 200
+    assert isinstance(r.json()["count"], int)
+
+
+def test_read_users_invalid_filter_and_sort(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    url = f"{settings.API_V1_STR}/users/"
+    for params in (
+        {"sort": "full_name"},
+        {"sort": "-hashed_password"},
+        {"filter": "hashed_password:eq:x"},
+        {"filter": "is_active:gt:true"},
+        {"filter": "is_active:eq:maybe"},
+        {"filter": "created_at:gt:2024-01-01T00:00:00"},
+        {"filter": "email"},
+    ):
+        r = client.get(url, headers=superuser_token_headers, params=params)
+        assert r.status_code == 400, params
+
+
+def test_export_users(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/users/export",
+        headers=superuser_token_headers,
+        params={"format": "csv"},
+    )
+    assert r.status_code == 200
+    header, *rows = r.text.splitlines()
+    assert header.split(",") == list(UserPublic.model_fields)
+    assert any(settings.FIRST_SUPERUSER in row for row in rows)
+
+
+def test_export_users_normal_user(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/users/export", headers=normal_user_token_headers
+    )
+    assert r.status_code == 403
+
+
 def test_update_user_me(
     client: TestClient, normal_user_token_headers: dict[str, str], db: Session
 ) -> None:
@@ -191,6 +304,67 @@ def test_update_user_me(
     assert user_db.full_name == full_name
 
 
+def test_update_user_me_statements(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    client.get(f"{settings.API_V1_STR}/users/me", headers=normal_user_token_headers)
+    # SELECT user, UPDATE user, no reload after the commit
+    with assert_num_queries(2):
+        r = client.patch(
+            f"{settings.API_V1_STR}/users/me",
+            headers=normal_user_token_headers,
+            json={"full_name": "Counted"},
+        )
+    assert r.status_code == 200
+    assert r.json()["full_name"] == "Counted"
+
+
+def test_read_user_me_not_modified(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    url = f"{settings.API_V1_STR}/users/me"
+    etag = client.get(url, headers=normal_user_token_headers).headers["etag"]
+    # Creating items bumps the item counter but not the user's version
+    client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=normal_user_token_headers,
+        json={"title": "Counted"},
+    )
+    r = client.get(url, headers={**normal_user_token_headers, "If-None-Match": etag})
+    assert r.status_code == 304
+    r = client.patch(
+        url,
+        headers={**normal_user_token_headers, "If-Match": '"0"'},
+        json={"full_name": "Stale"},
+    )
+    assert r.status_code == 412
+    r = client.patch(
+        url,
+        headers={**normal_user_token_headers, "If-Match": etag},
+        json={"full_name": "Fresh"},
+    )
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    r = client.get(url, headers={**normal_user_token_headers, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()["full_name"] == "Fresh"
+
+
+def test_read_user_me_after_update(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    # Cache the current user, then make sure the update invalidates it
+    client.get(f"{settings.API_V1_STR}/users/me", headers=normal_user_token_headers)
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/me",
+        headers=normal_user_token_headers,
+        json={"full_name": "Cached Name"},
+    )
+    assert r.status_code == 200
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=normal_user_token_headers)
+    assert r.json()["full_name"] == "Cached Name"
+
+
 def test_update_password_me(
     client: TestClient, superuser_token_headers: dict[str, str], db: Session
 ) -> None:
@@ -304,6 +478,18 @@ def test_register_user(client: TestClient, db: Session) -> None:
     assert verify_password(password, user_db.hashed_password)
 
 
+def test_register_user_rate_limited_by_ip(client: TestClient) -> None:
+    with patch("app.core.config.settings.RATE_LIMIT_PER_IP", 2):
+        for _ in range(2):
+            data = {"email": random_email(), "password": random_lower_string()}
+            r = client.post(f"{settings.API_V1_STR}/users/signup", json=data)
+            assert r.status_code == 200
+        data = {"email": random_email(), "password": random_lower_string()}
+        r = client.post(f"{settings.API_V1_STR}/users/signup", json=data)
+    assert r.status_code == 429
+    assert "Retry-After" in r.headers
+
+
 def test_register_user_already_exists_error(client: TestClient) -> None:
     password = random_lower_string()
     full_name = random_lower_string()
@@ -0,0 +1,27 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+
+def test_db_pool_status(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/db-pool/", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["pid"]
+    sync_pool = next(pool for pool in content["pools"] if pool["name"] == "sync")
+    assert sync_pool["size"] == settings.DB_POOL_SIZE
+    assert sync_pool["checkouts"] > 0
+    assert sync_pool["checked_out"] >= 1
+
+
+def test_db_pool_status_normal_user(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/db-pool/", headers=normal_user_token_headers
+    )
+    assert r.status_code == 403
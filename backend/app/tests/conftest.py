@@ -1,4 +1,5 @@
 from collections.abc import Generator
+from unittest.mock import patch
 
 import pytest
 from fastapi.testclient import TestClient
@@ -6,8 +7,10 @@ from sqlmodel import Session, delete
 
 from app.core.config import settings
 from app.core.db import engine, init_db
+from app.core.rate_limit import MemoryRateLimiter, rate_limiter
 from app.main import app
-from app.models import Item, User
+from app.models import EmailOutbox, Item, User
+from app.tests.utils.smtp import FakeSMTPServer
 from app.tests.utils.user import authentication_token_from_email
 from app.tests.utils.utils import get_superuser_token_headers
 
@@ -17,6 +20,8 @@ def db() -> Generator[Session, None, None]:
     with Session(engine) as session:
         init_db(session)
         yield session
+        statement = delete(EmailOutbox)
+        session.execute(statement)
         statement = delete(Item)
         session.execute(statement)
         statement = delete(User)
@@ -24,6 +29,18 @@ def db() -> Generator[Session, None, None]:
         session.commit()
 
 
+@pytest.fixture(autouse=True)
+def reset_rate_limits() -> Generator[None, None, None]:
+    # Every test client has the same address. Cleared after the test too, for
+    # the logins of module fixtures that are set up before the next test
+    if isinstance(rate_limiter, MemoryRateLimiter):
+        rate_limiter.clear()
+        yield
+        rate_limiter.clear()
+    else:
+        yield
+
+
 @pytest.fixture(scope="module")
 def client() -> Generator[TestClient, None, None]:
     with TestClient(app) as c:
@@ -40,3 +57,20 @@ def normal_user_token_headers(client: TestClient, db: Session) -> dict[str, str]
     return authentication_token_from_email(
         client=client, email=settings.EMAIL_TEST_USER, db=db
     )
+
+
+@pytest.fixture
+def smtp_server() -> Generator[FakeSMTPServer, None, None]:
+    server = FakeSMTPServer()
+    server.start()
+    with (
+        patch("app.core.config.settings.SMTP_HOST", "127.0.0.1"),
+        patch("app.core.config.settings.SMTP_PORT", server.port),
+        patch("app.core.config.settings.SMTP_TLS", False),
+        patch("app.core.config.settings.SMTP_SSL", False),
+        patch("app.core.config.settings.SMTP_USER", None),
+        patch("app.core.config.settings.SMTP_PASSWORD", None),
+        patch("app.core.config.settings.EMAILS_FROM_EMAIL", "info@example.com"),
+    ):
+        yield server
+    server.stop()
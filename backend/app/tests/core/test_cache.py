@@ -0,0 +1,48 @@
+import time
+
+from app.core.cache import MemoryCache
+from app.tests.utils.utils import make_settings
+
+
+def test_memory_cache_expires_entries() -> None:
+    cache = MemoryCache(max_size=10)
+    cache.set("key", {"value": 1}, ttl=0.01)
+    assert cache.get("key") == {"value": 1}
+    time.sleep(0.02)
+    assert cache.get("key") is None
+
+
+def test_memory_cache_evicts_least_recently_used() -> None:
+    cache = MemoryCache(max_size=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_memory_cache_delete() -> None:
+    cache = MemoryCache(max_size=2)
+    cache.set("a", 1, ttl=60)
+    cache.delete("a")
+    cache.delete("missing")
+    assert cache.get("a") is None
+
+
+def test_memory_cache_add() -> None:
+    cache = MemoryCache(max_size=2)
+    assert cache.add("a", 1, ttl=0.01)
+    assert not cache.add("a", 2, ttl=60)
+    assert cache.get("a") == 1
+    time.sleep(0.02)
+    assert cache.add("a", 3, ttl=60)
+    assert cache.get("a") == 3
+
+
+def test_user_cache_ttl_defaults_to_the_backend() -> None:
+    assert make_settings(CACHE_BACKEND="memory").USER_CACHE_TTL_SECONDS == 5
+    assert make_settings(CACHE_BACKEND="redis").USER_CACHE_TTL_SECONDS == 60
+    configured = make_settings(CACHE_BACKEND="memory", USER_CACHE_TTL_SECONDS=30)
+    assert configured.USER_CACHE_TTL_SECONDS == 30
@@ -0,0 +1,141 @@
+import gzip
+from collections.abc import Iterator
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import (
+    Compression,
+    CompressionMiddleware,
+    parse_accept_encoding,
+)
+
+BODY = "x" * 2000
+
+
+def make_client(compression: Compression) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(
+        CompressionMiddleware,
+        compression=compression,
+        minimum_size=1000,
+        gzip_level=6,
+        brotli_quality=4,
+    )
+
+    @app.get("/large")
+    def large() -> Response:
+        return PlainTextResponse(BODY)
+
+    @app.get("/small")
+    def small() -> Response:
+        return PlainTextResponse("x")
+
+    @app.get("/stream")
+    def stream() -> Response:
+        def chunks() -> Iterator[str]:
+            yield from (BODY[:1000], BODY[1000:])
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/encoded")
+    def encoded() -> Response:
+        return Response(
+            gzip.compress(BODY.encode()), headers={"Content-Encoding": "gzip"}
+        )
+
+    return TestClient(app)
+
+
+def test_gzip_large_response() -> None:
+    client = make_client("gzip")
+    r = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert int(r.headers["content-length"]) < len(BODY)
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert r.text == BODY
+
+
+def test_small_response_not_compressed() -> None:
+    r = make_client("gzip").get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+    assert r.text == "x"
+
+
+def test_not_accepted_not_compressed() -> None:
+    r = make_client("gzip").get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+    assert r.text == BODY
+
+
+def test_parse_accept_encoding() -> None:
+    assert parse_accept_encoding("br;q=0, GZIP , identity; q=0.5, x;q=2, y;q=z") == {
+        "br": 0.0,
+        "gzip": 1.0,
+        "identity": 0.5,
+        "x": 0.0,
+        "y": 0.0,
+    }
+    assert parse_accept_encoding("") == {}
+
+
+def test_refused_coding_not_used() -> None:
+    r = make_client("br").get("/large", headers={"Accept-Encoding": "br;q=0, gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    r = make_client("gzip").get(
+        "/large", headers={"Accept-Encoding": "identity;q=1, gzip;q=0"}
+    )
+    assert "content-encoding" not in r.headers
+    assert r.text == BODY
+
+
+def test_highest_quality_coding_used() -> None:
+    r = make_client("br").get(
+        "/large", headers={"Accept-Encoding": "br;q=0.5, gzip;q=0.8"}
+    )
+    assert r.headers["content-encoding"] == "gzip"
+    r = make_client("gzip").get(
+        "/large", headers={"Accept-Encoding": "gzip;q=0.5, identity"}
+    )
+    assert "content-encoding" not in r.headers
+    r = make_client("gzip").get("/large", headers={"Accept-Encoding": "*"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.text == BODY
+
+
+def test_gzip_streaming_response() -> None:
+    r = make_client("gzip").get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert "content-length" not in r.headers
+    assert r.text == BODY
+
+
+def test_already_encoded_response_untouched() -> None:
+    r = make_client("gzip").get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.text == BODY
+
+
+def test_brotli_falls_back_to_gzip() -> None:
+    r = make_client("br").get("/large", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.text == BODY
+
+
+def test_brotli_not_installed_falls_back_to_gzip() -> None:
+    # The middleware is built on the first request
+    with patch("app.core.compression.importlib.util.find_spec", return_value=None):
+        r = make_client("br").get("/large", headers={"Accept-Encoding": "br, gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.text == BODY
+
+
+def test_brotli_response() -> None:
+    # httpx decodes Brotli when the package is installed
+    pytest.importorskip("brotli")
+    r = make_client("br").get("/large", headers={"Accept-Encoding": "br, gzip"})
+    assert r.headers["content-encoding"] == "br"
+    assert r.text == BODY
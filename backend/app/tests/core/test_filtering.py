@@ -0,0 +1,34 @@
+import uuid
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlmodel import Session, col, select, text
+
+from app.core.filtering import ITEM_FIELDS, parse_sort
+from app.core.pagination import paginate
+from app.models import Item
+
+
+@pytest.mark.parametrize("sort", ["created_at", "-created_at", "-updated_at"])
+def test_owner_listing_sorts_by_index(db: Session, sort: str) -> None:
+    statement = paginate(
+        select(Item).where(col(Item.owner_id) == uuid.uuid4()),
+        Item,
+        skip=0,
+        limit=100,
+        after=None,
+        sort=parse_sort(ITEM_FIELDS, sort),
+    )
+    sql = statement.compile(
+        dialect=postgresql.dialect(),  # type: ignore[no-untyped-call]
+        compile_kwargs={"literal_binds": True},
+    )
+    with db.begin_nested():
+        # Whatever the table's statistics, only an index in the sort order can
+        # avoid both
+        db.exec(text("SET LOCAL enable_seqscan = off"))  # type: ignore
+        db.exec(text("SET LOCAL enable_sort = off"))  # type: ignore
+        plan = "\n".join(db.exec(text(f"EXPLAIN {sql}")).scalars())  # type: ignore
+    db.rollback()
+    assert f"ix_item_owner_id_{sort.removeprefix('-')}_id" in plan
+    assert "Sort" not in plan
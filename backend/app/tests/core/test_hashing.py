@@ -0,0 +1,48 @@
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import THREADPOOL_SIZE
+from app.core.hashing import HashingService, HashQueueFull
+from app.core.security import PWD_CONTEXT_KWARGS
+from app.tests.utils.utils import make_settings
+
+
+def test_hashing_service_roundtrip() -> None:
+    service = HashingService(PWD_CONTEXT_KWARGS, max_workers=1, max_pending=2)
+    try:
+        hashed = service.hash("secret-password").result()
+        assert service.verify("secret-password", hashed).result()
+        assert not service.verify("wrong-password", hashed).result()
+    finally:
+        service.shutdown()
+    assert service.pending == 0
+
+
+def test_hashing_service_rejects_when_full() -> None:
+    service = HashingService(PWD_CONTEXT_KWARGS, max_workers=1, max_pending=0)
+    with pytest.raises(HashQueueFull):
+        service.hash("secret-password")
+    assert service.pending == 0
+
+
+def test_hashing_service_recovers_from_broken_pool() -> None:
+    service = HashingService(PWD_CONTEXT_KWARGS, max_workers=1, max_pending=2)
+    try:
+        service.hash("secret-password").result()
+        executor = service._get_executor()
+        for process in executor._processes.values():
+            process.kill()
+        with pytest.raises(BrokenProcessPool):
+            service.hash("secret-password").result()
+        hashed = service.hash("secret-password").result()
+        assert service.verify("secret-password", hashed).result()
+    finally:
+        service.shutdown()
+
+
+def test_pending_hashes_leave_threads_to_other_routes() -> None:
+    assert make_settings().HASH_MAX_PENDING <= THREADPOOL_SIZE // 2
+    with pytest.raises(ValidationError, match="HASH_MAX_PENDING"):
+        make_settings(HASH_MAX_PENDING=THREADPOOL_SIZE)
@@ -0,0 +1,49 @@
+import time
+import uuid
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.ids import new_id, uuid7
+
+
+def test_uuid7_layout() -> None:
+    before = time.time_ns() // 1_000_000
+    id_ = uuid7()
+    after = time.time_ns() // 1_000_000
+    assert id_.version == 7
+    assert id_.variant == "specified in RFC 4122"
+    assert before <= id_.int >> 80 <= after
+
+
+def test_uuid7_is_increasing() -> None:
+    ids = [uuid7() for _ in range(10_000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+
+def test_uuid7_is_increasing_when_the_clock_goes_back() -> None:
+    first = uuid7()
+    with patch("app.core.ids.time.time_ns", return_value=0):
+        second = uuid7()
+    assert second > first
+
+
+def test_new_id_follows_the_setting() -> None:
+    with patch("app.core.config.settings.ID_GENERATOR", "uuid4"):
+        assert new_id().version == 4
+    with patch("app.core.config.settings.ID_GENERATOR", "uuid7"):
+        assert new_id().version == 7
+
+
+def test_items_get_uuid7_ids(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        json={"title": "Foo"},
+    )
+    assert r.status_code == 200
+    assert uuid.UUID(r.json()["id"]).version == 7
@@ -0,0 +1,81 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+
+from app.core.config import settings
+from app.core.hashing import HashingService
+from app.core.outbox import outbox
+from app.core.security import PWD_CONTEXT_KWARGS
+
+
+def get_samples(
+    client: TestClient,
+) -> dict[str, dict[tuple[tuple[str, str], ...], float]]:
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    samples: dict[str, dict[tuple[tuple[str, str], ...], float]] = {}
+    for family in text_string_to_metric_families(r.text):
+        for sample in family.samples:
+            labels = tuple(sorted(sample.labels.items()))
+            samples.setdefault(sample.name, {})[labels] = sample.value
+    return samples
+
+
+def test_request_duration_by_route(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    labels = (("method", "GET"), ("route", "items-read_items"), ("status", "200"))
+    before = get_samples(client)["http_request_duration_seconds_count"].get(labels, 0)
+    r = client.get(f"{settings.API_V1_STR}/items/", headers=superuser_token_headers)
+    assert r.status_code == 200
+    samples = get_samples(client)
+    assert samples["http_request_duration_seconds_count"][labels] == before + 1
+
+
+def test_unmatched_route(client: TestClient) -> None:
+    client.get("/missing")
+    labels = (("method", "GET"), ("route", "unmatched"), ("status", "404"))
+    assert get_samples(client)["http_request_duration_seconds_count"][labels] >= 1
+
+
+def test_pool_and_outbox_gauges(client: TestClient) -> None:
+    samples = get_samples(client)
+    assert samples["db_pool_size"][(("pool", "sync"),)] == settings.DB_POOL_SIZE
+    # Nothing is checked out between requests
+    assert samples["db_pool_checked_out"][(("pool", "sync"),)] == 0
+    assert samples["db_pool_wait_seconds_count"][(("pool", "sync"),)] > 0
+    assert samples["email_outbox_depth"][()] == outbox.depth()
+
+
+def test_hashing_service_observer() -> None:
+    timings: list[tuple[str, float, float]] = []
+    service = HashingService(
+        PWD_CONTEXT_KWARGS,
+        max_workers=1,
+        max_pending=2,
+        observer=lambda *timing: timings.append(timing),
+    )
+    try:
+        hashed = service.hash("secret-password").result()
+        assert service.verify("secret-password", hashed).result()
+    finally:
+        service.shutdown()
+    assert [operation for operation, _, _ in timings] == ["hash", "verify"]
+    assert all(queued >= 0 and duration > 0 for _, queued, duration in timings)
+
+
+def test_metrics_require_the_token(client: TestClient) -> None:
+    with patch("app.core.config.settings.METRICS_TOKEN", "scraper-token"):
+        r = client.get("/metrics")
+        assert r.status_code == 401
+        r = client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+        assert r.status_code == 401
+        r = client.get("/metrics", headers={"Authorization": "Bearer scraper-token"})
+        assert r.status_code == 200
+
+
+def test_metrics_hidden_without_token_outside_local(client: TestClient) -> None:
+    with patch("app.core.config.settings.ENVIRONMENT", "production"):
+        assert client.get("/metrics").status_code == 404
@@ -0,0 +1,168 @@
+import email
+import re
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, col, select
+
+from app.core.config import settings
+from app.core.outbox import (
+    DatabaseOutbox,
+    EmailWorker,
+    MemoryOutbox,
+    SMTPPool,
+    get_smtp_options,
+)
+from app.models import EmailOutbox
+from app.tests.utils.smtp import FakeSMTPServer
+from app.tests.utils.utils import random_email, random_lower_string
+from app.utils import verify_password_reset_token
+
+
+def make_email(email_to: str) -> EmailOutbox:
+    return EmailOutbox(
+        email_to=email_to,
+        subject="Hello",
+        template_name="test_email.html",
+        context={"project_name": "Test", "email": email_to},
+    )
+
+
+def test_memory_outbox_claims_once() -> None:
+    outbox = MemoryOutbox()
+    outbox.enqueue(make_email(random_email()))
+    claimed = outbox.claim(10)
+    assert len(claimed) == 1
+    assert claimed[0].attempts == 1
+    # Leased until the send timeout, so nobody else picks it up meanwhile
+    assert outbox.claim(10) == []
+
+
+def test_worker_reuses_smtp_connections(smtp_server: FakeSMTPServer) -> None:
+    outbox = MemoryOutbox()
+    recipients = [random_email() for _ in range(3)]
+    for email_to in recipients:
+        outbox.enqueue(make_email(email_to))
+    worker = EmailWorker(outbox, SMTPPool(1, get_smtp_options()))
+    try:
+        assert worker.run_once() == 3
+        assert worker.run_once() == 0
+    finally:
+        worker.stop()
+    assert sorted(
+        email.rcpt_to[0].strip("<>") for email in smtp_server.state.emails
+    ) == sorted(recipients)
+    assert smtp_server.state.connections == 1
+
+
+def test_worker_retries_failed_emails(smtp_server: FakeSMTPServer) -> None:
+    outbox = MemoryOutbox()
+    outbox.enqueue(make_email(random_email()))
+    smtp_server.state.fail_next = 1
+    worker = EmailWorker(outbox, SMTPPool(1, get_smtp_options()))
+    try:
+        with patch("app.core.config.settings.EMAIL_RETRY_BACKOFF_SECONDS", 60):
+            worker.run_once()
+            # Backing off
+            assert worker.run_once() == 0
+        assert smtp_server.state.emails == []
+        with patch("app.core.config.settings.EMAIL_RETRY_BACKOFF_SECONDS", 0):
+            (message,) = outbox._messages.values()
+            assert message.last_error
+            message.next_attempt_at = message.created_at
+            assert worker.run_once() == 1
+    finally:
+        worker.stop()
+    assert len(smtp_server.state.emails) == 1
+    assert outbox._messages == {}
+
+
+def test_database_outbox_delivery(db: Session, smtp_server: FakeSMTPServer) -> None:
+    email_to = random_email()
+    outbox = DatabaseOutbox()
+    outbox.enqueue(make_email(email_to))
+    worker = EmailWorker(outbox, SMTPPool(2, get_smtp_options()))
+    try:
+        while worker.run_once():
+            pass
+    finally:
+        worker.stop()
+    assert email_to in [
+        email.rcpt_to[0].strip("<>") for email in smtp_server.state.emails
+    ]
+    statement = select(EmailOutbox).where(col(EmailOutbox.email_to) == email_to)
+    assert db.exec(statement).first() is None
+
+
+def get_html(received: str) -> str:
+    message = email.message_from_string(received)
+    for part in message.walk():
+        if part.get_content_type() == "text/html":
+            payload = part.get_payload(decode=True)
+            assert isinstance(payload, bytes)
+            return payload.decode()
+    raise AssertionError("No HTML part")
+
+
+def test_database_outbox_stores_no_secrets(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: Session,
+    smtp_server: FakeSMTPServer,
+) -> None:
+    email_to = random_email()
+    password = random_lower_string()
+    r = client.post(
+        f"{settings.API_V1_STR}/users/",
+        headers=superuser_token_headers,
+        json={"email": email_to, "password": password},
+    )
+    assert r.status_code == 200
+    r = client.post(
+        f"{settings.API_V1_STR}/password-recovery/{email_to}",
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+    statement = select(EmailOutbox).where(col(EmailOutbox.email_to) == email_to)
+    queued = db.exec(statement).all()
+    assert sorted(message.template_name for message in queued) == [
+        "new_account.html",
+        "reset_password.html",
+    ]
+    for message in queued:
+        assert password not in message.model_dump_json()
+        assert "token" not in message.model_dump_json()
+
+    worker = EmailWorker(DatabaseOutbox(), SMTPPool(1, get_smtp_options()))
+    try:
+        while worker.run_once():
+            pass
+    finally:
+        worker.stop()
+    db.expire_all()
+    assert db.exec(statement).all() == []
+    html = "".join(get_html(received.data) for received in smtp_server.state.emails)
+    assert password not in html
+    # The reset link was added when the email was sent
+    match = re.search(r"reset-password\?token=([\w.-]+)", html)
+    assert match
+    assert verify_password_reset_token(match.group(1)) == email_to
+
+
+def test_database_outbox_clears_exhausted_emails(
+    db: Session, smtp_server: FakeSMTPServer
+) -> None:
+    email_to = random_email()
+    outbox = DatabaseOutbox()
+    outbox.enqueue(make_email(email_to))
+    smtp_server.state.fail_next = 1
+    worker = EmailWorker(outbox, SMTPPool(1, get_smtp_options()))
+    try:
+        with patch("app.core.config.settings.EMAIL_MAX_ATTEMPTS", 1):
+            assert worker.run_once() == 1
+    finally:
+        worker.stop()
+    statement = select(EmailOutbox).where(col(EmailOutbox.email_to) == email_to)
+    message = db.exec(statement).one()
+    assert message.last_error
+    assert message.context == {}
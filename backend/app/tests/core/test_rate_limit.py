@@ -0,0 +1,31 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.core.rate_limit import MemoryRateLimiter
+
+
+def test_memory_rate_limiter_refills() -> None:
+    limiter = MemoryRateLimiter(max_keys=10)
+    with patch("app.core.rate_limit.time.monotonic", return_value=100.0) as clock:
+        assert [limiter.acquire("key", 3, 60) for _ in range(3)] == [0, 0, 0]
+        # One token every 20 seconds
+        assert limiter.acquire("key", 3, 60) == pytest.approx(20)
+        assert limiter.acquire("other", 3, 60) == 0
+        clock.return_value = 110.0
+        assert limiter.acquire("key", 3, 60) == pytest.approx(10)
+        clock.return_value = 120.0
+        assert limiter.acquire("key", 3, 60) == 0
+        # Never more than the limit in the bucket
+        clock.return_value = 1000.0
+        assert [limiter.acquire("key", 3, 60) for _ in range(3)] == [0, 0, 0]
+        assert limiter.acquire("key", 3, 60) > 0
+
+
+def test_memory_rate_limiter_drops_least_recently_used() -> None:
+    limiter = MemoryRateLimiter(max_keys=2)
+    for key in ("a", "b", "a", "c"):
+        limiter.acquire(key, 1, 60)
+    # "b" was dropped and starts over with a full bucket, "a" wasn't
+    assert limiter.acquire("a", 1, 60) > 0
+    assert limiter.acquire("b", 1, 60) == 0
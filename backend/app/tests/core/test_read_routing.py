@@ -0,0 +1,142 @@
+from collections.abc import Generator
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from starlette.types import ASGIApp
+
+from app.core import db
+from app.core.config import settings
+from app.core.read_routing import LSN, READ_AFTER_COOKIE, ReadRoutingMiddleware
+from app.main import app
+
+
+@pytest.fixture
+def replica(monkeypatch: pytest.MonkeyPatch) -> Engine:
+    # With POSTGRES_REPLICAS set the tests run against the first replica,
+    # otherwise engines on the test database stand in for one
+    if db.replica_engines:
+        sync_replica = db.replica_engines[0]
+        async_replica = db.async_replica_engines[0]
+    else:
+        uri = str(settings.SQLALCHEMY_DATABASE_URI)
+        sync_replica = create_engine(uri, poolclass=NullPool)
+        async_replica = create_async_engine(uri, poolclass=NullPool)
+    monkeypatch.setattr(db, "replica_engines", [sync_replica])
+    monkeypatch.setattr(db, "async_replica_engines", [async_replica])
+    # Statements of the async engine go through its sync engine
+    return async_replica.sync_engine if settings.USE_ASYNC_DB else sync_replica
+
+
+@pytest.fixture
+def replica_statements(replica: Engine) -> Generator[list[str], None, None]:
+    statements: list[str] = []
+
+    def record(*args: Any) -> None:
+        statements.append(args[2])
+
+    event.listen(replica, "after_cursor_execute", record)
+    yield statements
+    event.remove(replica, "after_cursor_execute", record)
+
+
+@pytest.fixture
+def routed_client(
+    replica: Engine,  # noqa: ARG001
+) -> Generator[TestClient, None, None]:
+    routed_app: ASGIApp = app
+    if not settings.POSTGRES_REPLICAS:
+        routed_app = ReadRoutingMiddleware(app, max_age=10)
+    with TestClient(routed_app) as client:
+        yield client
+
+
+def test_get_reads_from_replica(
+    routed_client: TestClient,
+    superuser_token_headers: dict[str, str],
+    replica_statements: list[str],
+) -> None:
+    r = routed_client.get(
+        f"{settings.API_V1_STR}/items/", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    assert replica_statements
+    assert READ_AFTER_COOKIE not in r.cookies
+
+
+def test_export_reads_from_replica(
+    routed_client: TestClient,
+    superuser_token_headers: dict[str, str],
+    replica_statements: list[str],
+) -> None:
+    r = routed_client.get(
+        f"{settings.API_V1_STR}/items/export", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    assert any("FROM item" in s for s in replica_statements)
+
+
+def test_write_sets_read_after_cookie(
+    routed_client: TestClient,
+    superuser_token_headers: dict[str, str],
+    replica_statements: list[str],
+) -> None:
+    r = routed_client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        json={"title": "Foo"},
+    )
+    assert r.status_code == 200
+    assert not replica_statements
+    assert LSN.fullmatch(r.cookies[READ_AFTER_COOKIE])
+
+
+def test_read_your_writes(
+    routed_client: TestClient,
+    superuser_token_headers: dict[str, str],
+    replica_statements: list[str],
+) -> None:
+    r = routed_client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        json={"title": "Foo"},
+    )
+    item_id = r.json()["id"]
+    r = routed_client.get(
+        f"{settings.API_V1_STR}/items/{item_id}", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    assert r.json()["title"] == "Foo"
+    # The replica was asked whether it has replayed the write
+    assert "pg_last_wal_replay_lsn" in replica_statements[0]
+
+
+def test_lagging_replica_reads_from_primary(
+    routed_client: TestClient,
+    superuser_token_headers: dict[str, str],
+    replica_statements: list[str],
+) -> None:
+    routed_client.cookies.set(READ_AFTER_COOKIE, "FFFFFFFF/0")
+    r = routed_client.get(
+        f"{settings.API_V1_STR}/items/", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    assert len(replica_statements) == 1
+    assert "pg_last_wal_replay_lsn" in replica_statements[0]
+
+
+def test_invalid_read_after_cookie_is_ignored(
+    routed_client: TestClient,
+    superuser_token_headers: dict[str, str],
+    replica_statements: list[str],
+) -> None:
+    routed_client.cookies.set(READ_AFTER_COOKIE, "0/0'; DROP TABLE item")
+    r = routed_client.get(
+        f"{settings.API_V1_STR}/items/", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    assert replica_statements
+    assert not any("pg_last_wal_replay_lsn" in s for s in replica_statements)
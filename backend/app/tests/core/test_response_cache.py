@@ -0,0 +1,45 @@
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Request
+
+from app.core.config import settings
+from app.core.db import route_reads
+from app.core.response_cache import ResponseCache
+from app.models import UserPublic
+from app.tests.utils.utils import make_settings, random_email
+
+
+def make_request() -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": f"{settings.API_V1_STR}/items/",
+            "query_string": b"",
+            "headers": [],
+            "route": SimpleNamespace(name="read_items"),
+        }
+    )
+
+
+def test_response_cache_off_by_default_with_memory_backend() -> None:
+    assert make_settings(CACHE_BACKEND="memory").RESPONSE_CACHE_TTL_SECONDS == 0
+    assert make_settings(CACHE_BACKEND="redis").RESPONSE_CACHE_TTL_SECONDS == 30
+
+
+def test_response_cache_skipped_after_writes(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_TTL_SECONDS", 30)
+    user = UserPublic(
+        id=uuid.uuid4(),
+        email=random_email(),
+        version=1,
+        updated_at=datetime.now(timezone.utc),
+    )
+    with route_reads(True, None):
+        assert ResponseCache(make_request(), user).enabled
+    # The client wrote recently, its reads must see the write
+    with route_reads(True, "0/16B3748"):
+        assert not ResponseCache(make_request(), user).enabled
@@ -0,0 +1,77 @@
+import logging
+import re
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine, track_queries
+from app.core.server_timing import QueryStatsMiddleware
+
+
+def make_client(queries: int) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, repeated_threshold=2)
+
+    @app.get("/")
+    def run_queries() -> Response:
+        with Session(engine) as session:
+            for n in range(queries):
+                session.execute(text("SELECT :n"), {"n": n})
+        return PlainTextResponse("ok")
+
+    return TestClient(app)
+
+
+def test_server_timing_header(caplog: pytest.LogCaptureFixture) -> None:
+    with caplog.at_level(logging.WARNING, logger="app.core.server_timing"):
+        r = make_client(2).get("/")
+    match = re.fullmatch(
+        r'db;dur=[\d.]+;desc="(\d+) queries"', r.headers["server-timing"]
+    )
+    assert match
+    assert match.group(1) == "2"
+    assert not caplog.records
+
+
+def test_repeated_statement_warning(caplog: pytest.LogCaptureFixture) -> None:
+    with caplog.at_level(logging.WARNING, logger="app.core.server_timing"):
+        r = make_client(3).get("/")
+    assert 'desc="3 queries"' in r.headers["server-timing"]
+    [record] = caplog.records
+    assert "GET / ran the same statement 3 times" in record.getMessage()
+
+
+def test_api_server_timing(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(f"{settings.API_V1_STR}/items/", headers=superuser_token_headers)
+    assert r.status_code == 200
+    assert r.headers["server-timing"].startswith("db;dur=")
+
+
+def test_slow_query_logged(
+    caplog: pytest.LogCaptureFixture, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "DB_SLOW_QUERY_MS", 1.0)
+    with (
+        caplog.at_level(logging.WARNING, logger="app.core.db"),
+        engine.connect() as conn,
+    ):
+        conn.execute(text("SELECT pg_sleep(0.01)"))
+    [record] = caplog.records
+    assert record.getMessage().startswith("Slow query")
+
+
+def test_failed_statement_not_counted() -> None:
+    with track_queries() as stats, engine.connect() as conn:
+        with pytest.raises(ProgrammingError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        conn.rollback()
+        conn.execute(text("SELECT 1"))
+    assert stats.count == 1
@@ -0,0 +1,78 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, col, select
+
+from app import crud
+from app.core.config import settings
+from app.core.user_purge import claim_purge, purge_user
+from app.models import Item, ItemCreate, User, UserPurge
+from app.tests.utils.sql import count_queries
+from app.tests.utils.user import create_random_user
+
+
+def create_items(db: Session, user: User, n: int) -> None:
+    items_in = [ItemCreate(title=f"Item {i}") for i in range(n)]
+    crud.create_items(session=db, items_in=items_in, owner_id=user.id)
+    db.commit()
+
+
+def test_delete_user_does_not_load_items(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    user = create_random_user(db)
+    user_id = user.id
+    create_items(db, user, 3)
+    with count_queries() as statements:
+        r = client.delete(
+            f"{settings.API_V1_STR}/users/{user_id}",
+            headers=superuser_token_headers,
+        )
+    assert r.status_code == 200
+    assert not [s for s in statements if "FROM item" in s]
+    db.expire_all()
+    assert db.get(User, user_id) is None
+    assert not db.exec(select(Item).where(col(Item.owner_id) == user_id)).all()
+
+
+def test_delete_user_with_many_items_is_queued(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    user = create_random_user(db)
+    user_id = user.id
+    create_items(db, user, 5)
+    with (
+        patch("app.core.config.settings.USER_PURGE_THRESHOLD", 2),
+        patch("app.core.user_purge.purge_worker", None),
+    ):
+        r = client.delete(
+            f"{settings.API_V1_STR}/users/{user_id}",
+            headers=superuser_token_headers,
+        )
+    assert r.status_code == 202
+    assert r.json()["message"] == "User deletion scheduled"
+    db.expire_all()
+    db_user = db.get(User, user_id)
+    assert db_user is not None
+    assert not db_user.is_active
+    assert db.get(UserPurge, user_id) is not None
+
+    with patch("app.core.config.settings.USER_PURGE_CHUNK_SIZE", 2):
+        assert purge_user(user_id)
+    db.expire_all()
+    assert db.get(User, user_id) is None
+    assert db.get(UserPurge, user_id) is None
+    assert not db.exec(select(Item).where(col(Item.owner_id) == user_id)).all()
+
+
+def test_claim_purge_leases_the_purge(db: Session) -> None:
+    user = create_random_user(db)
+    db.add(UserPurge(user_id=user.id))
+    db.commit()
+    claimed = []
+    while (user_id := claim_purge()) is not None:
+        claimed.append(user_id)
+    assert user.id in claimed
+    # Running elsewhere until the lease is over
+    assert claim_purge() is None
+    assert purge_user(user.id)
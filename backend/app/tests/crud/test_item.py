@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, col, delete, text
+
+from app import crud
+from app.core.db import engine
+from app.models import Item, UserPublic
+from app.tests.utils.item import create_random_item
+
+
+def test_check_bulk_access_locks_the_items(db: Session) -> None:
+    item = create_random_item(db)
+    item_id = item.id
+    owner = UserPublic.model_validate(item.owner)
+    with Session(engine) as session, Session(engine) as other:
+        errors = crud.check_bulk_access(
+            session=session, ids=[item_id], current_user=owner
+        )
+        assert errors == {}
+        other.exec(text("SET LOCAL lock_timeout = '100ms'"))  # type: ignore
+        # Deleting the item has to wait for the batch to be written
+        with pytest.raises(OperationalError, match="lock timeout"):
+            other.exec(delete(Item).where(col(Item.id) == item_id))  # type: ignore
+    db.expire_all()
+    assert db.get(Item, item_id) is not None
@@ -1,8 +1,13 @@
 from fastapi.encoders import jsonable_encoder
+from passlib.context import CryptContext
 from sqlmodel import Session
 
 from app import crud
-from app.core.security import verify_password
+from app.core.security import (
+    get_pwd_context_kwargs,
+    password_needs_update,
+    verify_password,
+)
 from app.models import User, UserCreate, UserUpdate
 from app.tests.utils.utils import random_email, random_lower_string
 
@@ -89,3 +94,19 @@ def test_update_user(db: Session) -> None:
     assert user_2
     assert user.email == user_2.email
     assert verify_password(new_password, user_2.hashed_password)
+
+
+def test_authenticate_user_rehashes_outdated_hash(db: Session) -> None:
+    email = random_email()
+    password = random_lower_string()
+    weak_context = CryptContext(**get_pwd_context_kwargs(["bcrypt"], bcrypt_rounds=4))
+    user = User(email=email, hashed_password=weak_context.hash(password))
+    db.add(user)
+    db.commit()
+    assert password_needs_update(user.hashed_password)
+
+    authenticated_user = crud.authenticate(session=db, email=email, password=password)
+    assert authenticated_user
+    db.refresh(user)
+    assert not password_needs_update(user.hashed_password)
+    assert verify_password(password, user.hashed_password)
@@ -0,0 +1,13 @@
+import json
+import subprocess
+import sys
+
+
+def test_optional_subsystems_not_imported() -> None:
+    # Sentry, emails and jinja2 are imported on first use, see benchmarks.startup
+    code = "import sys, json, app.main; print(json.dumps(sorted(sys.modules)))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    ).stdout
+    modules = set(json.loads(output))
+    assert not modules & {"sentry_sdk", "emails", "jinja2"}
@@ -0,0 +1,98 @@
+import socketserver
+import threading
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ReceivedEmail:
+    mail_from: str
+    rcpt_to: list[str]
+    data: str
+
+
+@dataclass
+class FakeSMTPState:
+    emails: list[ReceivedEmail] = field(default_factory=list)
+    connections: int = 0
+    # Reject the next n emails with a temporary error
+    fail_next: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    """
+    Just enough of SMTP (RFC 5321) for smtplib, without TLS or auth.
+    """
+
+    server: "FakeSMTPServer"
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def readline(self) -> str | None:
+        line = self.rfile.readline()
+        return line.decode().rstrip("\r\n") if line else None
+
+    def handle(self) -> None:
+        state = self.server.state
+        with state.lock:
+            state.connections += 1
+        self.reply("220 fake-smtp ready")
+        mail_from = ""
+        rcpt_to: list[str] = []
+        while (line := self.readline()) is not None:
+            command = line[:4].upper()
+            if command == "EHLO":
+                self.reply("250-fake-smtp")
+                self.reply("250 8BITMIME")
+            elif command == "HELO":
+                self.reply("250 fake-smtp")
+            elif command == "MAIL":
+                mail_from = line.split(":", 1)[1].strip()
+                rcpt_to = []
+                self.reply("250 OK")
+            elif command == "RCPT":
+                rcpt_to.append(line.split(":", 1)[1].strip())
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while (data_line := self.readline()) not in (".", None):
+                    assert data_line is not None
+                    lines.append(data_line[1:] if data_line[:2] == ".." else data_line)
+                with state.lock:
+                    failing = state.fail_next > 0
+                    if failing:
+                        state.fail_next -= 1
+                    else:
+                        state.emails.append(
+                            ReceivedEmail(mail_from, rcpt_to, "\n".join(lines))
+                        )
+                self.reply("451 Try again later" if failing else "250 OK")
+            elif command == "RSET":
+                mail_from, rcpt_to = "", []
+                self.reply("250 OK")
+            elif command == "NOOP":
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), FakeSMTPHandler)
+        self.state = FakeSMTPState()
+        self.port = self.server_address[1]
+
+    def start(self) -> None:
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
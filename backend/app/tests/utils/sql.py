@@ -0,0 +1,37 @@
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import Any
+
+from sqlalchemy import event
+
+from app.core.db import CURRENT_LSN, engine
+
+
+@contextmanager
+def count_queries() -> Generator[list[str], None, None]:
+    """
+    Collect the SQL statements sent through the engine inside the block, except
+    the read routing's query of the WAL position after writes.
+    """
+    statements: list[str] = []
+
+    def before_cursor_execute(
+        _conn: Any, _cursor: Any, statement: str, *_args: Any
+    ) -> None:
+        if statement != CURRENT_LSN.text:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@contextmanager
+def assert_num_queries(expected: int) -> Generator[None, None, None]:
+    with count_queries() as statements:
+        yield
+    assert len(statements) == expected, "\n".join(
+        [f"{len(statements)} statements, expected {expected}:", *statements]
+    )
@@ -1,9 +1,10 @@
 import random
 import string
+from typing import Any
 
 from fastapi.testclient import TestClient
 
-from app.core.config import settings
+from app.core.config import Settings, settings
 
 
 def random_lower_string() -> str:
@@ -14,6 +15,11 @@ def random_email() -> str:
     return f"{random_lower_string()}@{random_lower_string()}.com"
 
 
+def make_settings(**values: Any) -> Settings:
+    # The other settings come from the environment
+    return Settings(**values)
+
+
 def get_superuser_token_headers(client: TestClient) -> dict[str, str]:
     login_data = {
         "username": settings.FIRST_SUPERUSER,
@@ -1,16 +1,19 @@
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from functools import cache
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import emails  # type: ignore
 import jwt
-from jinja2 import Template
 from jwt.exceptions import InvalidTokenError
 
 from app.core import security
 from app.core.config import settings
+from app.core.outbox import enqueue_email
+
+if TYPE_CHECKING:
+    from jinja2 import Environment
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,86 +21,112 @@ logger = logging.getLogger(__name__)
 
 @dataclass
 class EmailData:
-    html_content: str
     subject: str
+    template_name: str
+    context: dict[str, Any]
+
+    @property
+    def html_content(self) -> str:
+        return render_email(self.template_name, self.context)
+
+
+EMAIL_TEMPLATES_DIR = Path(__file__).parent / "email-templates" / "build"
+
+
+@cache
+def get_email_templates() -> "Environment":
+    """
+    Templates are parsed and compiled once per process, the bytecode cache lets
+    new processes skip the compilation too. Outside of local development the
+    files don't change, so they aren't checked for changes on every render.
+
+    Created on first use, processes that never send emails skip importing jinja2.
+    """
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+    return Environment(
+        loader=FileSystemLoader(EMAIL_TEMPLATES_DIR),
+        bytecode_cache=FileSystemBytecodeCache(),
+        auto_reload=settings.ENVIRONMENT == "local",
+        cache_size=-1,
+    )
+
+
+def load_email_templates() -> None:
+    email_templates = get_email_templates()
+    for template_name in email_templates.list_templates(extensions=["html"]):
+        email_templates.get_template(template_name)
 
 
 def render_email_template(*, template_name: str, context: dict[str, Any]) -> str:
-    template_str = (
-        Path(__file__).parent / "email-templates" / "build" / template_name
-    ).read_text()
-    html_content = Template(template_str).render(context)
+    html_content = get_email_templates().get_template(template_name).render(context)
     return html_content
 
 
-def send_email(
-    *,
-    email_to: str,
-    subject: str = "",
-    html_content: str = "",
-) -> None:
+def render_email(template_name: str, context: dict[str, Any]) -> str:
+    """
+    Render a queued email. Secrets like the password reset token are added to
+    the context here, when the email is sent, so the outbox never stores them.
+    """
+    if template_name == "reset_password.html":
+        token = generate_password_reset_token(email=context["username"])
+        link = f"{settings.FRONTEND_HOST}/reset-password?token={token}"
+        context = {**context, "link": link}
+    return render_email_template(template_name=template_name, context=context)
+
+
+def send_email(*, email_to: str, email_data: EmailData) -> None:
+    """
+    Queue an email in the outbox, it's rendered and sent by the email worker in
+    the background so the request doesn't wait on the SMTP server.
+    """
     assert settings.emails_enabled, "no provided configuration for email variables"
-    message = emails.Message(
-        subject=subject,
-        html=html_content,
-        mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
+    enqueue_email(
+        email_to=email_to,
+        subject=email_data.subject,
+        template_name=email_data.template_name,
+        context=email_data.context,
     )
-    smtp_options = {"host": settings.SMTP_HOST, "port": settings.SMTP_PORT}
-    if settings.SMTP_TLS:
-        smtp_options["tls"] = True
-    elif settings.SMTP_SSL:
-        smtp_options["ssl"] = True
-    if settings.SMTP_USER:
-        smtp_options["user"] = settings.SMTP_USER
-    if settings.SMTP_PASSWORD:
-        smtp_options["password"] = settings.SMTP_PASSWORD
-    response = message.send(to=email_to, smtp=smtp_options)
-    logger.info(f"send email result: {response}")
 
 
 def generate_test_email(email_to: str) -> EmailData:
     project_name = settings.PROJECT_NAME
     subject = f"{project_name} - Test email"
-    html_content = render_email_template(
+    return EmailData(
+        subject=subject,
         template_name="test_email.html",
         context={"project_name": settings.PROJECT_NAME, "email": email_to},
     )
-    return EmailData(html_content=html_content, subject=subject)
 
 
-def generate_reset_password_email(email_to: str, email: str, token: str) -> EmailData:
+def generate_reset_password_email(email_to: str, email: str) -> EmailData:
     project_name = settings.PROJECT_NAME
     subject = f"{project_name} - Password recovery for user {email}"
-    link = f"{settings.FRONTEND_HOST}/reset-password?token={token}"
-    html_content = render_email_template(
+    return EmailData(
+        subject=subject,
         template_name="reset_password.html",
         context={
             "project_name": settings.PROJECT_NAME,
             "username": email,
             "email": email_to,
             "valid_hours": settings.EMAIL_RESET_TOKEN_EXPIRE_HOURS,
-            "link": link,
         },
     )
-    return EmailData(html_content=html_content, subject=subject)
 
 
-def generate_new_account_email(
-    email_to: str, username: str, password: str
-) -> EmailData:
+def generate_new_account_email(email_to: str, username: str) -> EmailData:
     project_name = settings.PROJECT_NAME
     subject = f"{project_name} - New account for user {username}"
-    html_content = render_email_template(
+    return EmailData(
+        subject=subject,
         template_name="new_account.html",
         context={
             "project_name": settings.PROJECT_NAME,
             "username": username,
-            "password": password,
             "email": email_to,
             "link": settings.FRONTEND_HOST,
         },
     )
-    return EmailData(html_content=html_content, subject=subject)
 
 
 def generate_password_reset_token(email: str) -> str:
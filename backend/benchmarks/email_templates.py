@@ -0,0 +1,62 @@
+"""
+Email template renders per second, parsing the file on every render versus the
+cached environment.
+
+Run from the backend directory:
+
+    python -m benchmarks.email_templates --seconds 2
+"""
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+from typing import Any
+
+from jinja2 import Template
+
+from app.utils import EMAIL_TEMPLATES_DIR, load_email_templates, render_email_template
+
+CONTEXT: dict[str, Any] = {
+    "project_name": "Benchmark",
+    "username": "user@example.com",
+    "email": "user@example.com",
+    "valid_hours": 48,
+    "link": "http://localhost:5173/reset-password?token=token",
+}
+
+
+def render_uncached(template_name: str) -> str:
+    # What render_email_template used to do
+    template_str = (EMAIL_TEMPLATES_DIR / template_name).read_text()
+    html_content: str = Template(template_str).render(CONTEXT)
+    return html_content
+
+
+def render_cached(template_name: str) -> str:
+    return render_email_template(template_name=template_name, context=CONTEXT)
+
+
+def measure(render: Callable[[str], str], seconds: float) -> dict[str, float]:
+    count = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < seconds:
+        render("reset_password.html")
+        count += 1
+    return {
+        "renders_per_second": round(count / elapsed, 2),
+        "render_ms": round(elapsed / count * 1000, 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+    load_email_templates()
+    for name, render in (("uncached", render_uncached), ("cached", render_cached)):
+        print(json.dumps({"renderer": name, **measure(render, args.seconds)}))
+
+
+if __name__ == "__main__":
+    main()
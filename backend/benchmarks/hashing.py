@@ -0,0 +1,56 @@
+"""
+Password hashing throughput for each scheme and cost.
+
+Run from the backend directory:
+
+    python -m benchmarks.hashing --seconds 2
+"""
+
+import argparse
+import json
+import time
+from typing import Any
+
+from passlib.context import CryptContext
+
+from app.core.security import get_pwd_context_kwargs
+
+CONFIGURATIONS: list[tuple[str, dict[str, Any]]] = [
+    ("bcrypt", {"bcrypt_rounds": 10}),
+    ("bcrypt", {"bcrypt_rounds": 12}),
+    ("bcrypt", {"bcrypt_rounds": 14}),
+    ("argon2", {"argon2_time_cost": 2, "argon2_memory_cost": 19456}),
+    ("argon2", {"argon2_time_cost": 3, "argon2_memory_cost": 65536}),
+    ("argon2", {"argon2_time_cost": 4, "argon2_memory_cost": 131072}),
+]
+
+
+def measure(context: CryptContext, seconds: float) -> dict[str, float]:
+    hashed = context.hash("benchmark-password")
+    results = {}
+    for name, operation in (
+        ("hash", lambda: context.hash("benchmark-password")),
+        ("verify", lambda: context.verify("benchmark-password", hashed)),
+    ):
+        count = 0
+        start = time.perf_counter()
+        while (elapsed := time.perf_counter() - start) < seconds:
+            operation()
+            count += 1
+        results[f"{name}_per_second"] = round(count / elapsed, 2)
+        results[f"{name}_ms"] = round(elapsed / count * 1000, 2)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+    for scheme, costs in CONFIGURATIONS:
+        context = CryptContext(**get_pwd_context_kwargs([scheme], **costs))
+        result = {"scheme": scheme, **costs, **measure(context, args.seconds)}
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
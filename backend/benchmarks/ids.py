@@ -0,0 +1,98 @@
+"""
+Insert throughput, WAL volume and primary key index size with uuid4 and uuid7 ids.
+
+Run from the backend directory:
+
+    python -m benchmarks.ids --rows 10000000
+    python -m benchmarks.ids --rows 1000000 --generators uuid7
+
+Each generator fills its own table shaped like item, in COPY batches, and the
+table is dropped afterwards. Random uuid4 ids insert all over the primary key
+index, which slows down once the index no longer fits in shared_buffers, so
+compare the throughput of the last batches too.
+"""
+
+import argparse
+import json
+import time
+import uuid
+from collections.abc import Callable
+
+from sqlalchemy import text
+
+from app.core.db import engine
+from app.core.ids import uuid7
+
+GENERATORS: dict[str, Callable[[], uuid.UUID]] = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+
+
+def measure_generator(generate: Callable[[], uuid.UUID], n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        generate()
+    return n / (time.perf_counter() - start)
+
+
+def run(name: str, *, rows: int, batch_size: int) -> dict[str, object]:
+    generate = GENERATORS[name]
+    table = f"bench_ids_{name}"
+    with engine.connect() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(
+            text(
+                f"CREATE TABLE {table} (id uuid PRIMARY KEY, title varchar(255) "
+                "NOT NULL, created_at timestamptz NOT NULL DEFAULT now())"
+            )
+        )
+        conn.commit()
+        start_lsn = conn.execute(text("SELECT pg_current_wal_lsn()")).scalar_one()
+        cursor = conn.connection.dbapi_connection.cursor()  # type: ignore[union-attr]
+        batch_seconds = []
+        start = time.perf_counter()
+        for offset in range(0, rows, batch_size):
+            batch_start = time.perf_counter()
+            with cursor.copy(f"COPY {table} (id, title) FROM STDIN") as copy:
+                for n in range(offset, min(offset + batch_size, rows)):
+                    copy.write_row((generate(), f"Item {n}"))
+            conn.commit()
+            batch_seconds.append(time.perf_counter() - batch_start)
+        elapsed = time.perf_counter() - start
+        stats = conn.execute(
+            text(
+                "SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), :start_lsn), "
+                f"pg_relation_size('{table}_pkey'), pg_relation_size('{table}')"
+            ),
+            {"start_lsn": start_lsn},
+        ).one()
+        conn.execute(text(f"DROP TABLE {table}"))
+        conn.commit()
+    # The last tenth of the batches, once the index has grown
+    tail = batch_seconds[-max(len(batch_seconds) // 10, 1) :]
+    tail_rows = min(len(tail) * batch_size, rows)
+    return {
+        "generator": name,
+        "rows": rows,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(rows / elapsed),
+        "final_rows_per_second": round(tail_rows / sum(tail)),
+        "ids_per_second": round(measure_generator(generate, 100_000)),
+        "wal_mb": round(float(stats[0]) / 2**20, 1),
+        "index_mb": round(stats[1] / 2**20, 1),
+        "table_mb": round(stats[2] / 2**20, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument(
+        "--generators", nargs="+", choices=list(GENERATORS), default=list(GENERATORS)
+    )
+    args = parser.parse_args()
+    for name in args.generators:
+        print(json.dumps(run(name, rows=args.rows, batch_size=args.batch_size)))
+
+
+if __name__ == "__main__":
+    main()
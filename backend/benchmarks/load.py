@@ -0,0 +1,351 @@
+"""
+Latency percentiles and throughput of the main API flows under concurrent load.
+
+Run from the backend directory, after seeding with benchmarks.seed:
+
+    python -m benchmarks.load --seconds 5
+    python -m benchmarks.load --transport http --workers 4 --seconds 5
+
+With the asgi transport requests go straight to app.main:app in this process,
+with http a uvicorn server is started and requests go over real sockets. Each
+scenario prints a JSON line with the commit, so results of two commits can be
+compared with `--output`.
+
+The scenarios log in far more often than the login rate limits allow, so
+the benchmark turns them off in the app or server it runs. A scenario whose
+requests all fail measures nothing: it isn't reported, and the command exits
+with an error.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+
+from app.core.config import settings
+from benchmarks.seed import BENCH_PASSWORD, bench_email
+
+PAGE_SIZE = 100
+
+# Settings of the benchmarked app, 0 turns a rate limit off
+BENCH_SETTINGS = {"RATE_LIMIT_PER_IP": 0, "RATE_LIMIT_PER_EMAIL": 0}
+
+
+@dataclass
+class Stats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+
+@dataclass
+class Context:
+    client: httpx.AsyncClient
+    # Tokens of seeded users, for the per-user scenarios
+    user_tokens: list[str]
+    superuser_token: str
+    users: int
+    depth: int
+    stats: Stats = field(default_factory=Stats)
+    # Cursor walks in progress with their page number, shared by the clients
+    cursors: list[tuple[str, int]] = field(default_factory=list)
+
+    def user_headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {random.choice(self.user_tokens)}"}
+
+    def superuser_headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.superuser_token}"}
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.stats.latencies.append(time.perf_counter() - start)
+        if response.is_error:
+            self.stats.errors += 1
+        return response
+
+
+Scenario = Callable[[Context], Awaitable[None]]
+
+
+async def login(ctx: Context) -> None:
+    await ctx.request(
+        "POST",
+        f"{settings.API_V1_STR}/login/access-token",
+        data={
+            "username": bench_email(random.randint(1, ctx.users)),
+            "password": BENCH_PASSWORD,
+        },
+    )
+
+
+async def users_me(ctx: Context) -> None:
+    await ctx.request(
+        "GET", f"{settings.API_V1_STR}/users/me", headers=ctx.user_headers()
+    )
+
+
+async def item_crud(ctx: Context) -> None:
+    headers = ctx.user_headers()
+    response = await ctx.request(
+        "POST",
+        f"{settings.API_V1_STR}/items/",
+        headers=headers,
+        json={"title": "Load test item", "description": "Created under load"},
+    )
+    if response.is_error:
+        return
+    url = f"{settings.API_V1_STR}/items/{response.json()['id']}"
+    await ctx.request("GET", url, headers=headers)
+    await ctx.request("PUT", url, headers=headers, json={"title": "Updated"})
+    await ctx.request("DELETE", url, headers=headers)
+
+
+async def pagination_cursor(ctx: Context) -> None:
+    after, page = ctx.cursors.pop() if ctx.cursors else (None, 0)
+    params: dict[str, str | int] = {"limit": PAGE_SIZE, "count": "none"}
+    if after:
+        params["after"] = after
+    response = await ctx.request(
+        "GET",
+        f"{settings.API_V1_STR}/items/",
+        headers=ctx.superuser_headers(),
+        params=params,
+    )
+    next_cursor = None if response.is_error else response.json()["next_cursor"]
+    # The walk starts over once the last page or the maximum depth is reached
+    if next_cursor and page + 1 < ctx.depth:
+        ctx.cursors.append((next_cursor, page + 1))
+
+
+async def pagination_offset(ctx: Context) -> None:
+    await ctx.request(
+        "GET",
+        f"{settings.API_V1_STR}/items/",
+        headers=ctx.superuser_headers(),
+        params={
+            "skip": random.randrange(ctx.depth) * PAGE_SIZE,
+            "limit": PAGE_SIZE,
+            "count": "none",
+        },
+    )
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "login": login,
+    "users_me": users_me,
+    "item_crud": item_crud,
+    "pagination_cursor": pagination_cursor,
+    "pagination_offset": pagination_offset,
+}
+
+
+async def get_token(client: httpx.AsyncClient, username: str, password: str) -> str:
+    response = await client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": username, "password": password},
+    )
+    response.raise_for_status()
+    token: str = response.json()["access_token"]
+    return token
+
+
+async def run_scenario(
+    ctx: Context, scenario: Scenario, concurrency: int, seconds: float
+) -> float:
+    deadline = time.perf_counter() + seconds
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            await scenario(ctx)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+def summarize(stats: Stats, elapsed: float) -> dict[str, Any]:
+    latencies = stats.latencies
+    if len(latencies) < 2:
+        percentiles = [latencies[0] if latencies else 0.0] * 99
+    else:
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "errors": stats.errors,
+        "rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentiles[49] * 1000, 3),
+        "p95_ms": round(percentiles[94] * 1000, 3),
+        "p99_ms": round(percentiles[98] * 1000, 3),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+@contextmanager
+def uvicorn_server(workers: int) -> Iterator[str]:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--no-access-log",
+            "--log-level",
+            "warning",
+        ],
+        env={**os.environ, **{k: str(v) for k, v in BENCH_SETTINGS.items()}},
+        start_new_session=True,
+    )
+    try:
+        for _ in range(300):
+            if process.poll() is not None:
+                raise RuntimeError("uvicorn exited before serving requests")
+            try:
+                httpx.get(f"{base_url}{settings.API_V1_STR}/utils/health-check/")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError("uvicorn didn't start serving requests in time")
+        yield base_url
+    finally:
+        # The whole group, worker processes can outlive their supervisor
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait()
+
+
+async def run(args: argparse.Namespace, client: httpx.AsyncClient) -> list[str]:
+    """
+    Run the scenarios and report their results, returns the failed scenarios.
+    """
+    users = min(args.users, 20)
+    user_tokens = [
+        await get_token(client, bench_email(n), BENCH_PASSWORD)
+        for n in range(1, users + 1)
+    ]
+    superuser_token = await get_token(
+        client, settings.FIRST_SUPERUSER, settings.FIRST_SUPERUSER_PASSWORD
+    )
+    commit = git_commit()
+    failed = []
+    for name in args.scenario or SCENARIOS:
+        ctx = Context(
+            client=client,
+            user_tokens=user_tokens,
+            superuser_token=superuser_token,
+            users=args.users,
+            depth=args.depth,
+        )
+        # Warm up connections, caches and the database buffers
+        await run_scenario(ctx, SCENARIOS[name], args.concurrency, args.warmup)
+        ctx.stats = Stats()
+        elapsed = await run_scenario(
+            ctx, SCENARIOS[name], args.concurrency, args.seconds
+        )
+        if ctx.stats.errors == len(ctx.stats.latencies):
+            print(
+                f"{name}: all {ctx.stats.errors} requests failed, not reported",
+                file=sys.stderr,
+            )
+            failed.append(name)
+            continue
+        result = {
+            "scenario": name,
+            "transport": args.transport,
+            "workers": args.workers if args.transport == "http" else None,
+            "concurrency": args.concurrency,
+            "commit": commit,
+            **summarize(ctx.stats, elapsed),
+        }
+        line = json.dumps(result)
+        print(line)
+        if args.output:
+            with open(args.output, "a") as f:
+                f.write(line + "\n")
+    return failed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transport", choices=("asgi", "http"), default="asgi")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument(
+        "--scenario", action="append", choices=SCENARIOS, help="may be repeated"
+    )
+    # Must match the seeded users, see benchmarks.seed
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--depth", type=int, default=50, help="pages deep")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="file to append the results to")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    async def run_asgi() -> list[str]:
+        from app.main import app
+
+        for name, value in BENCH_SETTINGS.items():
+            setattr(settings, name, value)
+
+        # ASGITransport doesn't send lifespan events
+        transport = httpx.ASGITransport(app=app)
+        async with (
+            app.router.lifespan_context(app),
+            httpx.AsyncClient(transport=transport, base_url="http://test") as client,
+        ):
+            return await run(args, client)
+
+    async def run_http(base_url: str) -> list[str]:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+            return await run(args, client)
+
+    if args.transport == "asgi":
+        failed = asyncio.run(run_asgi())
+    else:
+        with uvicorn_server(args.workers) as base_url:
+            failed = asyncio.run(run_http(base_url))
+    if failed:
+        sys.exit(f"Failed scenarios: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
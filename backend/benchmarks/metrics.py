@@ -0,0 +1,76 @@
+"""
+Per request cost of the metrics middleware, on a route that does nothing.
+
+Run from the backend directory:
+
+    python -m benchmarks.metrics --seconds 2
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response
+from starlette.types import ASGIApp, Message
+
+from app.core.metrics import MetricsMiddleware
+
+
+def make_app(*, metrics: bool) -> FastAPI:
+    app = FastAPI()
+    if metrics:
+        app.add_middleware(MetricsMiddleware)
+
+    @app.get("/", tags=["bench"])
+    async def index() -> Response:
+        return PlainTextResponse("ok")
+
+    return app
+
+
+async def measure(app: ASGIApp, seconds: float) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/",
+        "raw_path": b"/",
+        "query_string": b"",
+        "headers": [],
+        "server": ("test", 80),
+    }
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(_message: Message) -> None:
+        pass
+
+    count = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < seconds:
+        await app(dict(scope), receive, send)
+        count += 1
+    return elapsed / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+    without = asyncio.run(measure(make_app(metrics=False), args.seconds))
+    with_metrics = asyncio.run(measure(make_app(metrics=True), args.seconds))
+    result = {
+        "without_us": round(without * 1e6, 2),
+        "with_us": round(with_metrics * 1e6, 2),
+        "overhead_us": round((with_metrics - without) * 1e6, 2),
+    }
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Seed the database with benchmark users and items, in a few set-based statements.
+
+Run from the backend directory:
+
+    python -m benchmarks.seed --users 1000 --items 100000
+
+Seeded users have emails ending in @bench.example.com and BENCH_PASSWORD as
+their password, items are spread evenly over them. Previous seed data is
+deleted first, other rows are left alone.
+"""
+
+import argparse
+import json
+import time
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.db import engine, init_db
+from app.core.ids import new_id
+from app.core.security import get_password_hash
+
+BENCH_DOMAIN = "bench.example.com"
+BENCH_PASSWORD = "benchmark-password"
+# Items inserted per statement, each with an array of that many ids
+BATCH_SIZE = 100_000
+
+
+def bench_email(n: int) -> str:
+    return f"user{n}@{BENCH_DOMAIN}"
+
+
+def seed(session: Session, *, users: int, items: int) -> None:
+    # Items go with their owners through the foreign key's ON DELETE CASCADE
+    session.execute(
+        text('DELETE FROM "user" WHERE email LIKE :pattern'),
+        {"pattern": f"%@{BENCH_DOMAIN}"},
+    )
+    # Ids from the app's generator, in creation order as in real data. A single
+    # hash, hashing every password would dominate the seeding time
+    session.execute(
+        text(
+            'INSERT INTO "user" (id, email, hashed_password, is_active, '
+            "is_superuser, full_name, created_at, updated_at) "
+            "SELECT u.id, 'user' || n || '@' || :domain, :hash, "
+            "true, false, 'Bench user ' || n, ts, ts "
+            "FROM unnest(CAST(:ids AS uuid[])) WITH ORDINALITY AS u(id, n), "
+            "LATERAL (SELECT now() - make_interval(secs => :users - n)) AS t(ts)"
+        ),
+        {
+            "domain": BENCH_DOMAIN,
+            "hash": get_password_hash(BENCH_PASSWORD),
+            "ids": [new_id() for _ in range(users)],
+            "users": users,
+        },
+    )
+    # Distinct created_at values, so pages are ordered as in real data
+    for offset in range(0, items, BATCH_SIZE):
+        batch = min(BATCH_SIZE, items - offset)
+        session.execute(
+            text(
+                "WITH owners AS ("
+                '  SELECT id, row_number() OVER (ORDER BY email) - 1 AS n FROM "user"'
+                "  WHERE email LIKE :pattern"
+                ") "
+                "INSERT INTO item (id, title, description, owner_id, created_at, "
+                "updated_at) "
+                "SELECT i.id, 'Item ' || g, 'Benchmark item number ' || g, "
+                "owners.id, ts, ts "
+                "FROM unnest(CAST(:ids AS uuid[])) WITH ORDINALITY AS i(id, n), "
+                "LATERAL (SELECT i.n + :offset) AS s(g) "
+                "JOIN owners ON owners.n = g % :users, "
+                "LATERAL (SELECT now() - make_interval(secs => (:items - g) / 1000.0)) "
+                "AS t(ts)"
+            ),
+            {
+                "pattern": f"%@{BENCH_DOMAIN}",
+                "ids": [new_id() for _ in range(batch)],
+                "offset": offset,
+                "items": items,
+                "users": users,
+            },
+        )
+    session.execute(
+        text(
+            'UPDATE "user" SET item_count = counts.n '
+            "FROM (SELECT owner_id, count(*) AS n FROM item GROUP BY owner_id) "
+            'AS counts WHERE "user".id = counts.owner_id '
+            'AND "user".email LIKE :pattern'
+        ),
+        {"pattern": f"%@{BENCH_DOMAIN}"},
+    )
+    # Fresh statistics for the planner and for estimated counts, committed
+    # along with the rows
+    session.execute(text('ANALYZE "user", item'))
+    session.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--items", type=int, default=10_000)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    with Session(engine) as session:
+        # The load scenarios log in as the first superuser too
+        init_db(session)
+        seed(session, users=args.users, items=args.items)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"users": args.users, "items": args.items, "seconds": elapsed}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Time from a fresh worker process to its first response, and the slowest imports.
+
+Run from the backend directory:
+
+    python -m benchmarks.startup --runs 5
+
+Each run starts a new interpreter that imports app.main, runs the lifespan and
+serves a health check, like a newly spawned worker. The slowest modules come
+from `python -X importtime`, by time spent in the module itself.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD = """
+import json, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    client.get("/api/v1/utils/health-check/").raise_for_status()
+    print(json.dumps({
+        "import_s": imported - start,
+        "first_request_s": time.perf_counter() - imported,
+    }))
+"""
+
+
+def run_once() -> dict[str, float]:
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    result: dict[str, float] = json.loads(output.splitlines()[-1])
+    result["total_s"] = time.perf_counter() - start
+    return result
+
+
+def slowest_imports(count: int) -> list[dict[str, str | int]]:
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stderr
+    modules: list[tuple[int, int, str]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        modules.append((int(self_us), int(cumulative_us), name.strip()))
+    return [
+        {"module": name, "self_us": self_us, "cumulative_us": cumulative_us}
+        for self_us, cumulative_us, name in sorted(modules, reverse=True)[:count]
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--imports", type=int, default=15, help="slowest to list")
+    args = parser.parse_args()
+    runs = [run_once() for _ in range(args.runs)]
+    result = {
+        f"median_{key}": round(statistics.median(run[key] for run in runs), 3)
+        for key in ("import_s", "first_request_s", "total_s")
+    }
+    print(json.dumps({"runs": args.runs, **result}))
+    for module in slowest_imports(args.imports):
+        print(json.dumps(module))
+
+
+if __name__ == "__main__":
+    main()